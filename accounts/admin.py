@@ -1,4 +1,14 @@
 from django.contrib import admin
+from bloodconnect.admin import LargeTableAdmin
 from .models import Profile
 # Register your models here.
-admin.site.register(Profile)
\ No newline at end of file
+
+
+@admin.register(Profile)
+class ProfileAdmin(LargeTableAdmin):
+    list_display = ("user", "blood_group", "pincode", "last_donated", "donation_count")
+    list_select_related = ("user",)
+    list_filter = ("blood_group",)
+    search_fields = ("=user__username", "=user__email")
+    autocomplete_fields = ("user",)
+    readonly_fields = ("donation_count", "created_at", "updated_at")
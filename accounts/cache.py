@@ -0,0 +1,119 @@
+"""
+Per-process cache of authenticated users, loaded together with their
+profile in one joined query.
+
+Entries are keyed by user id, expire after ``AUTH_USER_CACHE_TTL``
+seconds and are LRU-bounded to ``AUTH_USER_CACHE_SIZE``. Saves and
+deletes of a User or Profile drop the entry (see accounts.signals);
+other worker processes only notice once the TTL runs out.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+
+def detach(user):
+    """
+    Copy of ``user`` and its cached profile that can be modified without
+    touching the original. Model.__getstate__ gives a shallow copy its own
+    _state and fields_cache; field values are shared, which is fine as
+    they are only ever replaced, never modified in place.
+    """
+    user = copy.copy(user)
+    profile = user._state.fields_cache.get("profile")
+
+    if profile is not None:
+        profile = copy.copy(profile)
+        profile._state.fields_cache["user"] = user
+        user._state.fields_cache["profile"] = profile
+
+    return user
+
+
+class UserCache:
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # bumped on every invalidation, so a load that raced with a save
+        # is not stored
+        self.version = 0
+
+    def queryset(self):
+        return User.objects.select_related("profile")
+
+    def lookup(self, user_id):
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None:
+                return None, self.version
+
+            user, expires = entry
+            if expires <= now:
+                del self.entries[user_id]
+                return None, self.version
+
+            self.entries.move_to_end(user_id)
+
+        # callers may modify request.user (profile updates), never hand
+        # out the shared instance
+        return detach(user), None
+
+    def store(self, user, version):
+        with self.lock:
+            if version != self.version:
+                return
+
+            self.entries[user.pk] = (
+                detach(user), time.monotonic() + self.ttl
+            )
+            self.entries.move_to_end(user.pk)
+
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get(self, user_id):
+        """Return the user with ``profile`` loaded; raises User.DoesNotExist."""
+        user_id = User._meta.pk.to_python(user_id)
+        user, version = self.lookup(user_id)
+
+        if user is None:
+            user = self.queryset().get(pk=user_id)
+            self.store(user, version)
+
+        return user
+
+    async def aget(self, user_id):
+        user_id = User._meta.pk.to_python(user_id)
+        user, version = self.lookup(user_id)
+
+        if user is None:
+            user = await self.queryset().aget(pk=user_id)
+            self.store(user, version)
+
+        return user
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.version += 1
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+
+
+users = UserCache(
+    max_size=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL,
+)
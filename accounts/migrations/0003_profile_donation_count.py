@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_profile_created_at_alter_profile_user"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="donation_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_profile_donation_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="pincode",
+            field=models.CharField(blank=True, max_length=6),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -19,10 +19,22 @@ class Profile(models.Model):
     phone = models.CharField(max_length=15)
     blood_group = models.CharField(max_length=3, choices=BLOOD_GROUPS)
     location = models.TextField()
+    # optional; used to rank donors near a request
+    pincode = models.CharField(max_length=6, blank=True)
     last_donated = models.DateField(null=True, blank=True)
-    
+    # finalized donations, kept up to date by FinalizeDonorView
+    donation_count = models.PositiveIntegerField(default=0)
+
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # recommendations rescore donors whose profile changed since their last run
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # compatible donors for recommendations, admin blood group filter
+            models.Index(fields=["blood_group"], name="profile_blood_group_idx"),
+        ]
 
     def __str__(self):
         return self.user.username
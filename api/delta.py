@@ -0,0 +1,68 @@
+"""
+``?since=`` delta sync for list endpoints.
+
+With ``since`` (an ISO 8601 timestamp, normally the ``cursor`` of the
+previous sync) a list endpoint answers::
+
+    {"changed": [...], "removed": ["<key>", ...], "cursor": "..."}
+
+``changed`` holds the rows in the list whose ``updated_at`` is newer than
+``since``. ``removed`` holds keys of rows that changed but no longer match
+the list, plus tombstones of deleted rows, so the cost follows the number
+of changes rather than the list size.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from donations.models import Tombstone
+from .serializers.base import DATETIME
+
+
+def parse_since(request):
+    value = request.GET.get("since")
+
+    if not value:
+        return None
+
+    try:
+        return DATETIME.to_internal_value(value)
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({"since": exc.detail})
+
+
+def next_cursor():
+    # rows committed late by a slow transaction carry an updated_at a
+    # little in the past; overlapping the next window picks them up
+    cursor = timezone.now() - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    return DATETIME.to_representation(cursor)
+
+
+def tombstones(kind, since, **filters):
+    return Tombstone.objects.filter(
+        kind=kind, deleted_at__gt=since, **filters
+    ).values_list("key", flat=True)
+
+
+def delta(changed, moved, buried, key):
+    # moved: keys of rows updated since, whether or not still listed
+    listed = {row[key] for row in changed}
+
+    return {
+        "changed": changed,
+        "removed": [k for k in moved if k not in listed] + list(buried),
+    }
+
+
+async def adelta(changed, moved, buried, key):
+    listed = {row[key] for row in changed}
+
+    return {
+        "changed": changed,
+        "removed": (
+            [k async for k in moved if k not in listed]
+            + [k async for k in buried]
+        ),
+    }
@@ -0,0 +1,21 @@
+import django_filters
+from donations.models import Request
+from donations.search import search_requests
+
+
+class RequestFilter(django_filters.FilterSet):
+    urgency = django_filters.ChoiceFilter(choices=Request.URGENCY_CHOICES)
+    pincode_prefix = django_filters.CharFilter(
+        field_name="pincode",
+        lookup_expr="startswith"
+    )
+    # ?created_after=YYYY-MM-DD&created_before=YYYY-MM-DD
+    created = django_filters.DateFromToRangeFilter(field_name="created_at")
+    q = django_filters.CharFilter(method="search")
+
+    class Meta:
+        model = Request
+        fields = ["urgency", "pincode_prefix", "created", "q"]
+
+    def search(self, queryset, name, value):
+        return search_requests(queryset, value)
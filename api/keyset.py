@@ -0,0 +1,31 @@
+"""
+``?before=<key>&limit=N`` keyset pages for the feed and chat history.
+
+Rows are read newest first by a key that grows with time: the feed by
+(created_at, id), with the short_id of the last row as the cursor, and
+chat history by ChatMessage.id. The next page is everything below the
+last key of the current one, so pages stay put while new rows arrive and
+no rows are skipped the way OFFSET skips them. Without ``limit`` the whole list is returned, as before.
+"""
+from rest_framework import serializers
+
+
+def parse_page(request, maximum, key=str):
+    before = request.GET.get("before") or None
+    limit = request.GET.get("limit")
+
+    try:
+        if before is not None:
+            before = key(before)
+    except ValueError:
+        raise serializers.ValidationError({"before": ["Not a valid cursor."]})
+
+    if limit is None:
+        return before, None
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise serializers.ValidationError({"limit": ["A valid integer is required."]})
+
+    return before, max(1, min(limit, maximum))
@@ -0,0 +1,169 @@
+import asyncio
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import include, path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Profile
+from api.views.chat import ChatMessageListView, ConversationListView
+from api.views.profile import MyProfileView
+from api.views.request import RequestListCreateView
+from chat.models import ChatMessage
+from donations.models import Request, AcceptedDonor
+
+# URLconf with the sync DRF views at the same paths, used for comparison
+urlpatterns = [
+    path("api/", include([
+        path("profile/me/", MyProfileView.as_view()),
+        path("requests/", RequestListCreateView.as_view()),
+        path("chat/conversations/", ConversationListView.as_view()),
+        path("chat/messages/<str:room_id>/", ChatMessageListView.as_view()),
+    ])),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the async read endpoints with their sync DRF versions under "
+        "concurrent load, through the real ASGI handler. Creates and then "
+        "deletes its own bench_* users and rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--rows", type=int, default=50)
+
+    def handle(self, *args, **options):
+        users = self.seed(options["rows"])
+
+        try:
+            asyncio.run(self.run(options))
+        finally:
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+
+    def seed(self, rows):
+        User.objects.filter(username__startswith="bench_async_").delete()
+
+        requester = User.objects.create_user("bench_async_requester")
+        donor = User.objects.create_user("bench_async_donor")
+        Profile.objects.filter(user__in=[requester, donor]).update(
+            blood_group="AB+", location="Bench City"
+        )
+
+        Request.objects.bulk_create(
+            Request(
+                requester=requester,
+                patient_name=f"Patient {i}",
+                patient_age=30,
+                blood_group="A+",
+                urgency="Emergency",
+                location="Bench City",
+                pincode="500001",
+            )
+            for i in range(rows)
+        )
+
+        room = AcceptedDonor.objects.create(
+            request=Request.objects.filter(requester=requester).first(),
+            donor=donor,
+        )
+        ChatMessage.objects.bulk_create(
+            ChatMessage(room=room, sender=donor, message=f"message {i}")
+            for i in range(rows)
+        )
+
+        self.token = str(AccessToken.for_user(donor))
+        self.paths = [
+            "/api/requests/",
+            "/api/chat/conversations/",
+            f"/api/chat/messages/{room.unique_id}/",
+            "/api/profile/me/",
+        ]
+        return [requester, donor]
+
+    async def run(self, options):
+        app = ASGIHandler()
+
+        for path_ in self.paths:
+            label = path_.split("/")[2] if "messages" not in path_ else "chat/messages"
+
+            async_result = await self.load(app, path_, options)
+
+            with override_settings(ROOT_URLCONF=__name__):
+                sync_result = await self.load(app, path_, options)
+
+            self.stdout.write(f"{label} ({path_})")
+            for name, (rps, p50, p95) in (("sync", sync_result), ("async", async_result)):
+                self.stdout.write(
+                    f"  {name:<6} {rps:8.0f} req/s   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms"
+                )
+
+    async def load(self, app, path_, options):
+        total = options["requests"]
+        queue = iter(range(total))
+        latencies = []
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                status = await self.call(app, path_)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if status != 200:
+                    raise RuntimeError(f"{path_} answered {status}")
+
+        # warm up connections and caches
+        await self.call(app, path_)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return (
+            total / elapsed,
+            statistics.median(latencies),
+            latencies[int(len(latencies) * 0.95) - 1],
+        )
+
+    async def call(self, app, path_):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path_,
+            "raw_path": path_.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", f"Bearer {self.token}".encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+        status = None
+        sent_body = False
+
+        async def receive():
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # no disconnect until the handler is done with us
+            await asyncio.Future()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(scope, receive, send)
+        return status
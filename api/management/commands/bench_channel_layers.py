@@ -0,0 +1,122 @@
+import asyncio
+import os
+import statistics
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+
+from bloodconnect.channel_layer import LocalChannelLayer, socket_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare channel layer throughput and latency: point-to-point "
+        "send/receive and group_send fan-out, for the in-memory layer, "
+        "LocalChannelLayer and (with --redis-url or REDIS_URL) channels_redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--group-size", type=int, default=50)
+        parser.add_argument("--redis-url", default=os.getenv("REDIS_URL"))
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
+
+    def layers(self, options):
+        # capacity high enough that nothing is dropped during the bench
+        capacity = options["messages"] + 1
+        path = os.path.join(socket_dir(), f"bench-channels-{os.getpid()}.sock")
+
+        yield "in-memory", InMemoryChannelLayer(capacity=capacity)
+        yield "local", LocalChannelLayer(path=path, capacity=capacity, idle_exit=5)
+
+        if not options["redis_url"]:
+            self.stdout.write("redis: skipped, no --redis-url / REDIS_URL")
+            return
+
+        try:
+            from channels_redis.core import RedisChannelLayer
+        except ImportError:
+            self.stdout.write("redis: skipped, channels_redis is not installed")
+            return
+
+        yield "redis", RedisChannelLayer(hosts=[options["redis_url"]], capacity=capacity)
+
+    async def run(self, options):
+        for name, layer in self.layers(options):
+            await layer.flush()
+
+            rate, p50, p95 = await self.point_to_point(layer, options)
+            self.stdout.write(
+                f"{name:<10} send/receive {rate:9.0f} msg/s   "
+                f"p50 {p50:6.2f} ms   p95 {p95:6.2f} ms"
+            )
+
+            rate, p50, p95 = await self.fan_out(layer, options)
+            self.stdout.write(
+                f"{name:<10} group_send   {rate:9.0f} deliveries/s   "
+                f"p50 {p50:6.2f} ms   p95 {p95:6.2f} ms"
+            )
+
+            await layer.flush()
+            await layer.close()
+
+    async def point_to_point(self, layer, options):
+        # one consumer per producer, like chat consumers each on their channel
+        pairs = options["concurrency"]
+        per_pair = max(1, options["messages"] // pairs)
+        latencies = []
+
+        async def produce(channel):
+            for _ in range(per_pair):
+                await layer.send(channel, {"type": "bench", "sent": time.perf_counter()})
+
+        async def consume(channel):
+            for _ in range(per_pair):
+                message = await layer.receive(channel)
+                latencies.append((time.perf_counter() - message["sent"]) * 1000)
+
+        channels = [await layer.new_channel() for _ in range(pairs)]
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(produce(c) for c in channels),
+            *(consume(c) for c in channels),
+        )
+        elapsed = time.perf_counter() - start
+
+        return (len(latencies) / elapsed, *self.percentiles(latencies))
+
+    async def fan_out(self, layer, options):
+        # one group, e.g. a blood group feed, with many subscribers
+        members = [await layer.new_channel() for _ in range(options["group_size"])]
+        sends = max(1, options["messages"] // len(members))
+        latencies = []
+
+        for channel in members:
+            await layer.group_add("bench", channel)
+
+        async def consume(channel):
+            for _ in range(sends):
+                message = await layer.receive(channel)
+                latencies.append((time.perf_counter() - message["sent"]) * 1000)
+
+        async def produce():
+            for _ in range(sends):
+                await layer.group_send("bench", {"type": "bench", "sent": time.perf_counter()})
+
+        start = time.perf_counter()
+        await asyncio.gather(produce(), *(consume(c) for c in members))
+        elapsed = time.perf_counter() - start
+
+        for channel in members:
+            await layer.group_discard("bench", channel)
+
+        return (len(latencies) / elapsed, *self.percentiles(latencies))
+
+    def percentiles(self, latencies):
+        latencies.sort()
+        return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
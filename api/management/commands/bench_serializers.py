@@ -0,0 +1,126 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Profile
+from api.serializers.donor import AcceptedDonorSerializer, AcceptedDonorReadSerializer
+from api.serializers.profile import ProfileSerializer, ProfileReadSerializer
+from api.serializers.request import RequestSerializer, RequestReadSerializer
+from donations.models import Request, AcceptedDonor
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the ModelSerializers with the lean read serializers. "
+        "Rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1000, 10000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options["rows"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat):
+        requester = User.objects.create_user("bench_requester")
+        donor = User.objects.create_user("bench_donor")
+        Profile.objects.filter(user=donor).update(
+            blood_group="O-", location="Bench City"
+        )
+
+        http_request = APIRequestFactory().get("/api/requests/")
+        http_request.user = donor
+        context = {"request": http_request}
+
+        created = 0
+        for size in sorted(sizes):
+            Request.objects.bulk_create(
+                Request(
+                    requester=requester,
+                    patient_name=f"Patient {i}",
+                    patient_age=30,
+                    blood_group="A+",
+                    urgency="Emergency",
+                    location="Bench City",
+                    pincode="500001",
+                    reason="Surgery",
+                )
+                for i in range(created, size)
+            )
+            # every other request already accepted → can_accept varies
+            new_requests = Request.objects.order_by("id")[created:size]
+            AcceptedDonor.objects.bulk_create(
+                AcceptedDonor(request=r, donor=donor)
+                for r in list(new_requests)[::2]
+            )
+            created = size
+
+            requests = Request.objects.order_by("-created_at")
+            offers = AcceptedDonor.objects.order_by("-accepted_at")
+
+            self.compare(
+                f"requests x{size}", repeat,
+                lambda: RequestSerializer(
+                    requests.select_related("requester"),
+                    many=True, context=context
+                ).data,
+                lambda: RequestReadSerializer(
+                    requests, many=True, context=context
+                ).data,
+            )
+            self.compare(
+                f"accepted donors x{size}", repeat,
+                lambda: AcceptedDonorSerializer(
+                    offers.select_related("donor", "request"), many=True
+                ).data,
+                lambda: AcceptedDonorReadSerializer(offers, many=True).data,
+            )
+
+        profiles = Profile.objects.filter(user=donor)
+        self.compare(
+            "profile x1", repeat * 100,
+            lambda: ProfileSerializer(profiles.get()).data,
+            lambda: ProfileReadSerializer(profiles).data,
+        )
+
+    def compare(self, label, repeat, full, lean):
+        render = JSONRenderer().render
+
+        full_body = render(full())
+        lean_body = render(lean())
+        if full_body != lean_body:
+            raise CommandError(f"{label}: lean output differs from the ModelSerializer")
+
+        full_time = self.best_of(repeat, full)
+        lean_time = self.best_of(repeat, lean)
+
+        self.stdout.write(
+            f"{label:<24} full {full_time * 1000:9.1f} ms"
+            f"   lean {lean_time * 1000:9.1f} ms"
+            f"   speedup {full_time / lean_time:5.1f}x"
+        )
+
+    def best_of(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
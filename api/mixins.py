@@ -0,0 +1,25 @@
+from rest_framework.permissions import SAFE_METHODS
+from bloodconnect.routers import read_from_replica
+
+
+class ReplicaReadMixin:
+    """Serve safe (read-only) requests of a view from a read replica."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self._replica_reads = None
+
+        if request.method in SAFE_METHODS:
+            user_id = request.user.id if request.user.is_authenticated else None
+            self._replica_reads = read_from_replica(user_id)
+            self._replica_reads.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_reads = getattr(self, "_replica_reads", None)
+
+        if replica_reads is not None:
+            replica_reads.__exit__(None, None, None)
+            self._replica_reads = None
+
+        return super().finalize_response(request, response, *args, **kwargs)
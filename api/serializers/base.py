@@ -0,0 +1,47 @@
+from rest_framework import serializers
+
+# shared field instances, used only for their to_representation()
+# so the lean serializers format values exactly like the DRF ones
+DATETIME = serializers.DateTimeField()
+DATE = serializers.DateField()
+
+
+class ReadSerializer:
+    """
+    Read-only stand-in for a ModelSerializer on hot read paths.
+
+    Rows are projected with ``QuerySet.values(*columns)`` and turned into
+    plain dicts by ``to_representation``, skipping DRF's per-field
+    machinery. Output must stay identical to the ModelSerializer it mirrors.
+    """
+
+    columns = ()
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    def get_rows(self):
+        return list(self.instance.values(*self.columns))
+
+    async def aget_rows(self):
+        return [row async for row in self.instance.values(*self.columns)]
+
+    def to_representation(self, row):
+        # the row as projected; subclasses rename and format columns
+        return {column: row[column] for column in self.columns}
+
+    def build(self, rows):
+        if not self.many:
+            return self.to_representation(rows[0])
+
+        return [self.to_representation(row) for row in rows]
+
+    @property
+    def data(self):
+        return self.build(self.get_rows())
+
+    async def adata(self):
+        # same output as .data, for async views
+        return self.build(await self.aget_rows())
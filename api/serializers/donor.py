@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from donations.models import AcceptedDonor
+from .base import ReadSerializer, DATETIME
 
 
 class AcceptedDonorSerializer(serializers.ModelSerializer):
@@ -28,3 +29,28 @@ class AcceptedDonorCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = AcceptedDonor
         fields = []  # No body required — derived from context
+
+
+class AcceptedDonorReadSerializer(ReadSerializer):
+    """Lean, list-only equivalent of AcceptedDonorSerializer."""
+
+    columns = (
+        "id",
+        "donor__username",
+        "donor__profile__location",
+        "request_id",
+        "request__blood_group",
+        "accepted_at",
+        "unique_id",
+    )
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "username": row["donor__username"],
+            "city": row["donor__profile__location"],
+            "request_id": row["request_id"],
+            "request_blood_group": row["request__blood_group"],
+            "accepted_at": DATETIME.to_representation(row["accepted_at"]),
+            "unique_id": row["unique_id"],
+        }
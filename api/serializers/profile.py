@@ -1,9 +1,11 @@
 from rest_framework import serializers
 from accounts.models import Profile
+from .base import ReadSerializer, DATE
 
 class ProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source="user.email", required=False)
     username = serializers.CharField(source="user.username", required=False)
+    donation_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Profile
@@ -11,7 +13,9 @@ class ProfileSerializer(serializers.ModelSerializer):
             "phone",
             "blood_group",
             "location",
+            "pincode",
             "last_donated",
+            "donation_count",
             "email",
             "username",
         ]
@@ -24,7 +28,41 @@ class ProfileSerializer(serializers.ModelSerializer):
             user = instance.user
             user.email = user_data.get("email", user.email)
             user.username = user_data.get("username", user.username)
-            user.save()
+            user.save(update_fields=["email", "username"])
 
-        # Update Profile fields
-        return super().update(instance, validated_data)
+        # Update Profile fields, and only those: donation_count and
+        # last_donated are also written by FinalizeDonorView
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+
+        if validated_data:
+            instance.save(update_fields=[*validated_data, "updated_at"])
+
+        return instance
+
+
+class ProfileReadSerializer(ReadSerializer):
+    """Lean, read-only equivalent of ProfileSerializer."""
+
+    columns = (
+        "phone",
+        "blood_group",
+        "location",
+        "pincode",
+        "last_donated",
+        "donation_count",
+        "user__email",
+        "user__username",
+    )
+
+    def to_representation(self, row):
+        return {
+            "phone": row["phone"],
+            "blood_group": row["blood_group"],
+            "location": row["location"],
+            "pincode": row["pincode"],
+            "last_donated": DATE.to_representation(row["last_donated"]),
+            "donation_count": row["donation_count"],
+            "email": row["user__email"],
+            "username": row["user__username"],
+        }
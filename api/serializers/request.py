@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from donations.models import Request,AcceptedDonor
 from .donor import AcceptedDonorSerializer
+from .base import ReadSerializer, DATETIME
 
 class RequestSerializer(serializers.ModelSerializer):
     requester_name = serializers.CharField(
@@ -80,3 +81,75 @@ class RequestWithDonorsSerializer(serializers.ModelSerializer):
             "status",
             "accepted_donors",
         ]
+
+
+class RequestReadSerializer(ReadSerializer):
+    """Lean, list-only equivalent of RequestSerializer."""
+
+    columns = (
+        "id",
+        "short_id",
+        "requester_id",
+        "requester__username",
+        "patient_name",
+        "patient_age",
+        "blood_group",
+        "urgency",
+        "location",
+        "pincode",
+        "reason",
+        "status",
+        "created_at",
+    )
+
+    def accepted_for(self, rows):
+        # one query for the whole page instead of one exists() per row
+        request = self.context.get("request")
+        # websocket consumers have no request and pass the user directly
+        user = self.context.get("user") or getattr(request, "user", None)
+
+        if not (user and user.is_authenticated and rows):
+            return None
+
+        self.user_id = user.id
+        return AcceptedDonor.objects.filter(
+            donor=user,
+            request_id__in=[row["id"] for row in rows]
+        ).values_list("request_id", flat=True)
+
+    def get_rows(self):
+        rows = super().get_rows()
+        accepted = self.accepted_for(rows)
+        self.accepted = None if accepted is None else set(accepted)
+        return rows
+
+    async def aget_rows(self):
+        rows = await super().aget_rows()
+        accepted = self.accepted_for(rows)
+        self.accepted = (
+            None if accepted is None else {pk async for pk in accepted}
+        )
+        return rows
+
+    def to_representation(self, row):
+        can_accept = (
+            self.accepted is not None
+            and row["requester_id"] != self.user_id
+            and row["status"] == "Pending"
+            and row["id"] not in self.accepted
+        )
+
+        return {
+            "short_id": row["short_id"],
+            "requester_name": row["requester__username"],
+            "patient_name": row["patient_name"],
+            "patient_age": row["patient_age"],
+            "blood_group": row["blood_group"],
+            "urgency": row["urgency"],
+            "location": row["location"],
+            "pincode": row["pincode"],
+            "reason": row["reason"],
+            "status": row["status"],
+            "created_at": DATETIME.to_representation(row["created_at"]),
+            "can_accept": can_accept,
+        }
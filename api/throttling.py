@@ -0,0 +1,27 @@
+from rest_framework.throttling import BaseThrottle
+from bloodconnect import ratelimit
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Applies ``settings.RATE_LIMITS[view.throttle_scope]`` per user and per
+    IP. Views without a ``throttle_scope`` are not limited.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+
+        if not scope:
+            return True
+
+        user = request.user
+        self.wait_time = ratelimit.check(
+            scope,
+            user=user.id if user and user.is_authenticated else None,
+            ip=self.get_ident(request),
+        )
+
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
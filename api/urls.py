@@ -1,27 +1,50 @@
 from django.urls import path
-from api.views.auth import RegisterView
-from api.views.profile import MyProfileView
-from rest_framework_simplejwt.views import TokenObtainPairView , TokenRefreshView
+from api.views.auth import RegisterView, LoginView
+from rest_framework_simplejwt.views import TokenRefreshView
 from api.views.request import (
-    RequestListCreateView,
     RequestDetailView,
+    RequestBulkCreateView,
 )
 from api.views.donor import (
-    AcceptRequestView , AcceptedDonorListView , FinalizeDonorView
+    AcceptRequestView , AcceptedDonorListView , FinalizeDonorView,
+    RecommendedDonorsView,
 )
-from api.views.chat import ChatMessageListView , ConversationListView
+from api.views.async_read import (
+    request_feed, conversation_list, chat_message_list, my_profile
+)
+from api.views.chat import ChatSearchView
+from api.views.stats import PendingStatsView, MyStatsView
+from api.views.export import ExportView
+from api.views.events import EventTailView
+from api.views.metrics import (
+    DatabasePoolMetricsView, PasswordHashMetricsView, ChatRecentMetricsView,
+)
+from api.views.profiling import ProfileListView, ProfileTokenView, ProfileDetailView
 
 urlpatterns = [
     path("auth/register/", RegisterView.as_view()),
-    path("auth/login/", TokenObtainPairView.as_view()),
+    path("auth/login/", LoginView.as_view()),
     path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-    path("profile/me/", MyProfileView.as_view()),
-    path("requests/", RequestListCreateView.as_view()),
+    path("profile/me/", my_profile),
+    path("requests/", request_feed),
     path("requests/donors/",AcceptedDonorListView.as_view()),
+    path("requests/bulk/", RequestBulkCreateView.as_view()),
     path("requests/<str:short_id>/", RequestDetailView.as_view()),
     path("requests/<str:short_id>/accept/", AcceptRequestView.as_view()),
+    path("requests/<str:short_id>/recommendations/", RecommendedDonorsView.as_view()),
     path("donors/<str:unique_id>/finalize/",FinalizeDonorView.as_view()),
-    path("chat/conversations/",ConversationListView.as_view()),
-    path("chat/messages/<str:room_id>/" , ChatMessageListView.as_view()),
+    path("chat/conversations/", conversation_list),
+    path("chat/messages/<str:room_id>/", chat_message_list),
+    path("chat/search/", ChatSearchView.as_view()),
+    path("stats/pending/", PendingStatsView.as_view()),
+    path("stats/me/", MyStatsView.as_view()),
+    path("export/<str:dataset>/", ExportView.as_view()),
+    path("events/", EventTailView.as_view()),
+    path("metrics/db-pool/", DatabasePoolMetricsView.as_view()),
+    path("metrics/password-hashing/", PasswordHashMetricsView.as_view()),
+    path("metrics/chat-recent/", ChatRecentMetricsView.as_view()),
+    path("profiles/", ProfileListView.as_view()),
+    path("profiles/token/", ProfileTokenView.as_view()),
+    path("profiles/<str:name>/", ProfileDetailView.as_view()),
     
 ]
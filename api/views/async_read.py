@@ -0,0 +1,202 @@
+"""
+Async-native versions of the busiest read endpoints.
+
+Under the uvicorn worker a sync DRF view costs a thread-pool hop per
+request; these handle GET on the event loop with the async ORM and
+produce the same JSON as their DRF counterparts. Any other method is
+handed to the original DRF view.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.utils import translate_validation
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+
+from accounts.cache import users
+from accounts.models import Profile
+from api.authentication import AsyncJWTAuthentication
+from api.delta import parse_since, next_cursor, tombstones, adelta
+from api.filters import RequestFilter
+from api.serializers.profile import ProfileReadSerializer
+from api.serializers.request import RequestReadSerializer
+from api.views.chat import (
+    ChatMessageListView, ConversationListView,
+    conversation_rooms, conversation_entry,
+    user_in_room, room_messages, ordered_entries,
+    recent_page, keep_recent,
+)
+from api.views.profile import MyProfileView
+from api.views.request import (
+    RequestListCreateView, feed_queryset, feed_moved, feed_page,
+)
+from bloodconnect.routers import ais_pinned, read_from_replica
+from donations.models import AcceptedDonor
+
+authenticator = AsyncJWTAuthentication()
+renderer = JSONRenderer()
+
+
+def render(data, status=200, headers=None):
+    # DRF's renderer, so the bytes match the sync views
+    return HttpResponse(
+        renderer.render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_get(drf_view):
+    """
+    Serve GET with the decorated coroutine, authenticated like the DRF
+    views (JWT, IsAuthenticated) and reading from a replica unless the
+    user is pinned to the primary. Other methods go to ``drf_view``.
+    """
+    fallback = sync_to_async(drf_view.as_view())
+
+    def decorator(handler):
+
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return await fallback(request, *args, **kwargs)
+
+            unauthorized = {"WWW-Authenticate": authenticator.authenticate_header(request)}
+
+            try:
+                # DRF's test client force_authenticate() sets these
+                forced_user = getattr(request, "_force_auth_user", None)
+
+                if forced_user is not None:
+                    # reloaded through the user cache, so the profile is
+                    # loaded the same way as for a real token
+                    auth = (
+                        await users.aget(forced_user.pk),
+                        getattr(request, "_force_auth_token", None),
+                    )
+                else:
+                    auth = await authenticator.aauthenticate(request)
+            except exceptions.AuthenticationFailed as exc:
+                detail = exc.detail
+                if not isinstance(detail, (list, dict)):
+                    detail = {"detail": detail}
+                return render(detail, status=401, headers=unauthorized)
+
+            if auth is None:
+                return render(
+                    {"detail": exceptions.NotAuthenticated.default_detail},
+                    status=401,
+                    headers=unauthorized,
+                )
+
+            request.user = auth[0]
+            pinned = await ais_pinned(request.user.id)
+
+            try:
+                with read_from_replica(pinned=pinned):
+                    return await handler(request, *args, **kwargs)
+            except Http404 as exc:
+                return render({"detail": str(exc)}, status=404)
+
+        return view
+
+    return decorator
+
+
+@async_get(RequestListCreateView)
+async def request_feed(request):
+    user = request.user
+
+    # profile comes with the (cached) authenticated user
+    donor_blood = getattr(getattr(user, "profile", None), "blood_group", None)
+
+    filterset = RequestFilter(
+        request.GET,
+        queryset=feed_queryset(user, donor_blood),
+        request=request,
+    )
+    if not filterset.is_valid():
+        return render(translate_validation(filterset.errors).detail, status=400)
+
+    try:
+        since = parse_since(request)
+        page = feed_page(filterset.qs, request) if since is None else None
+    except exceptions.ValidationError as exc:
+        return render(exc.detail, status=400)
+
+    if since is None:
+        serializer = RequestReadSerializer(
+            page, many=True, context={"request": request}
+        )
+        return render(await serializer.adata())
+
+    cursor = next_cursor()
+    serializer = RequestReadSerializer(
+        filterset.qs.filter(updated_at__gt=since),
+        many=True,
+        context={"request": request},
+    )
+
+    return render({
+        **await adelta(
+            await serializer.adata(),
+            feed_moved(user, donor_blood, since),
+            tombstones("request", since),
+            key="short_id",
+        ),
+        "cursor": cursor,
+    })
+
+
+@async_get(ConversationListView)
+async def conversation_list(request):
+    user = request.user
+
+    return render({
+        "as_requester": [
+            conversation_entry(room, "requester")
+            async for room in conversation_rooms(user, "requester")
+        ],
+        "as_donor": [
+            conversation_entry(room, "donor")
+            async for room in conversation_rooms(user, "donor")
+        ],
+    })
+
+
+@async_get(ChatMessageListView)
+async def chat_message_list(request, room_id):
+    room = await AcceptedDonor.objects.select_related(
+        "request"
+    ).filter(unique_id=room_id).afirst()
+
+    if room is None:
+        raise Http404("No AcceptedDonor matches the given query.")
+
+    if not user_in_room(request.user, room):
+        return render({"error": "Not allowed"}, status=403)
+
+    try:
+        data = recent_page(room, request)
+        if data is None:
+            messages = room_messages(room, request)
+    except exceptions.ValidationError as exc:
+        return render(exc.detail, status=400)
+
+    if data is None:
+        data = ordered_entries([m async for m in messages])
+        keep_recent(room, request, data)
+
+    return render(data)
+
+
+@async_get(MyProfileView)
+async def my_profile(request):
+    serializer = ProfileReadSerializer(
+        Profile.objects.filter(user=request.user)
+    )
+    return render(await serializer.adata())
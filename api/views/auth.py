@@ -1,4 +1,5 @@
 from rest_framework.generics import CreateAPIView
+from rest_framework_simplejwt.views import TokenObtainPairView
 from api.serializers.auth import RegisterSerializer
 from django.contrib.auth.models import User
 
@@ -6,3 +7,8 @@ class RegisterView(CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = []
+    throttle_scope = "register"
+
+
+class LoginView(TokenObtainPairView):
+    throttle_scope = "login"
@@ -1,93 +1,176 @@
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Q, OuterRef, Subquery
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import LimitOffsetPagination
+from api.mixins import ReplicaReadMixin
 from donations.models import AcceptedDonor
 from chat.models import ChatMessage
+from chat.search import search_messages
+from chat.recent import recent
+from api.keyset import parse_page
 from django.shortcuts import get_object_or_404
 
 
-class ChatMessageListView(APIView):
+def user_in_room(user, room):
+    return user.id in (room.request.requester_id, room.donor_id)
+
+
+def room_messages(room, request):
+    messages = ChatMessage.objects.filter(
+        room=room
+    ).select_related("sender")
+
+    before, limit = parse_page(request, settings.CHAT_PAGE_MAX, key=int)
+
+    if before is not None:
+        messages = messages.filter(id__lt=before)
+    if limit is None:
+        return messages.order_by("id")
+
+    # the newest ``limit`` messages before the cursor; see ordered_entries
+    return messages.order_by("-id")[:limit]
+
+
+def recent_page(room, request):
+    """The first page (``?limit=`` without ``before``) if chat.recent has it."""
+    before, limit = parse_page(request, settings.CHAT_PAGE_MAX, key=int)
+
+    if before is None and limit is not None:
+        return recent.page(room.unique_id, limit)
+    return None
+
+
+def keep_recent(room, request, entries):
+    # a first page read from the database fills chat.recent for the next one
+    before, limit = parse_page(request, settings.CHAT_PAGE_MAX, key=int)
+
+    if before is None and limit is not None:
+        recent.fill(room.unique_id, entries, complete=len(entries) < limit)
+
+
+def ordered_entries(messages):
+    # oldest first, however the page was read
+    return [message_entry(m) for m in sorted(messages, key=lambda m: m.id)]
+
+
+def message_entry(m):
+    return {
+        "id": m.id,
+        "sender": {
+            "id": m.sender.id,
+            "username": m.sender.username,
+        },
+        "content": m.message,
+        "timestamp": m.timestamp,
+    }
+
+
+class ChatMessageListView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, room_id):
-        room = get_object_or_404(AcceptedDonor, unique_id=room_id)
+        room = get_object_or_404(
+            AcceptedDonor.objects.select_related("request"),
+            unique_id=room_id
+        )
 
-        if room.request.requester != request.user and room.donor != request.user:
+        if not user_in_room(request.user, room):
             return Response({"error": "Not allowed"}, status=403)
 
-        messages = ChatMessage.objects.filter(
-            room=room
-        ).select_related("sender").order_by('timestamp')
-
-        data = [
-            {
-                "id": m.id,
-                "sender": {
-                    "id": m.sender.id,
-                    "username": m.sender.username,
-                },
-                "content": m.message,
-                "timestamp": m.timestamp,
-            }
-            for m in messages
-        ]
+        data = recent_page(room, request)
+
+        if data is None:
+            data = ordered_entries(room_messages(room, request))
+            keep_recent(room, request, data)
 
         return Response(data)
-    
 
 
-class ConversationListView(APIView):
+
+def conversation_rooms(user, role):
+    # other side's profile and the last message come in the same query
+    last_message = ChatMessage.objects.filter(
+        room=OuterRef("pk")
+    ).order_by("-timestamp").values("message")[:1]
+
+    rooms = AcceptedDonor.objects.select_related(
+        "donor__profile",
+        "request",
+        "request__requester__profile"
+    ).annotate(
+        last_message=Subquery(last_message)
+    )
+
+    # Rooms where I am the requester
+    if role == "requester":
+        return rooms.filter(request__requester=user)
+
+    # Rooms where I am the donor
+    return rooms.filter(donor=user)
+
+
+def conversation_entry(room, role):
+    if role == "requester":
+        other_user = room.donor
+    else:
+        other_user = room.request.requester
+
+    return {
+        "id": other_user.id,
+        "username": other_user.username,
+        "unique_id": room.unique_id,
+        "blood_group": other_user.profile.blood_group,
+        "last_message": room.last_message,
+        "unread_count": 0
+    }
+
+
+class ConversationListView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user = request.user
 
-        # Rooms where I am the requester
-        requester_rooms = AcceptedDonor.objects.select_related(
-            "donor",
-            "request",
-            "request__requester"
-        ).filter(
-            request__requester=user
-        )
+        response_data = {
+            "as_requester": [
+                conversation_entry(room, "requester")
+                for room in conversation_rooms(user, "requester")
+            ],
+            "as_donor": [
+                conversation_entry(room, "donor")
+                for room in conversation_rooms(user, "donor")
+            ],
+        }
 
-        # Rooms where I am the donor
-        donor_rooms = AcceptedDonor.objects.select_related(
-            "donor",
-            "request",
-            "request__requester"
-        ).filter(
-            donor=user
-        )
+        return Response(response_data)
 
-        def build_data(rooms, role):
-            result = []
 
-            for room in rooms:
-                if role == "requester":
-                    other_user = room.donor
-                else:
-                    other_user = room.request.requester
+class ChatSearchPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
 
-                last_message = ChatMessage.objects.filter(
-                    room=room
-                ).order_by("-timestamp").first()
 
-                result.append({
-                    "id": other_user.id,
-                    "username": other_user.username,
-                    "unique_id": room.unique_id,
-                    "blood_group": other_user.profile.blood_group,
-                    "last_message": last_message.message if last_message else None,
-                    "unread_count": 0
-                })
+class ChatSearchView(ReplicaReadMixin, APIView):
+    """
+    ?q=<words>, best match first, across every room the user is in.
+    Paginated with ?limit= and ?offset=.
+    """
+    permission_classes = [IsAuthenticated]
 
-            return result
+    def get(self, request):
+        user = request.user
+        messages = ChatMessage.objects.filter(
+            Q(room__request__requester=user) | Q(room__donor=user)
+        ).select_related("sender", "room")
 
-        response_data = {
-            "as_requester": build_data(requester_rooms, "requester"),
-            "as_donor": build_data(donor_rooms, "donor"),
-        }
+        paginator = ChatSearchPagination()
+        page = paginator.paginate_queryset(
+            search_messages(messages, request.GET.get("q", "")), request, view=self
+        )
 
-        return Response(response_data)
\ No newline at end of file
+        return paginator.get_paginated_response([
+            {**message_entry(m), "room": m.room.unique_id}
+            for m in page
+        ])
@@ -1,17 +1,29 @@
 from rest_framework.generics import ListAPIView
 from donations.models import AcceptedDonor
-from api.serializers.donor import AcceptedDonorSerializer
+from api.serializers.donor import AcceptedDonorReadSerializer
+from api.serializers.base import DATE
+from api.mixins import ReplicaReadMixin
+from api.delta import parse_since, next_cursor, tombstones, delta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from donations.models import Request, AcceptedDonor
+from donations.models import Request, AcceptedDonor, Recommendation
 from donations.utils import is_compatible
+from donations.counters import track_requests, track_offers
+from donations.events import event, append
+from django.db import transaction
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from accounts.cache import users
+from accounts.models import Profile
 from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import ValidationError
 
 
 class AcceptRequestView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = "accept"
 
     def post(self, request, short_id):
         blood_request = Request.objects.get(short_id=short_id)
@@ -27,29 +39,57 @@ class AcceptRequestView(APIView):
         ).exists():
             raise ValidationError("You have already accepted this request.")
 
-        AcceptedDonor.objects.create(
-            request=blood_request,
-            donor=request.user
-        )
+        with transaction.atomic():
+            offer = AcceptedDonor.objects.create(
+                request=blood_request,
+                donor=request.user
+            )
+            track_offers([(offer.donor_id, None, offer.status)])
+            append([
+                event(
+                    "offer.created", offer.unique_id, offer.donor_id,
+                    request=blood_request.short_id,
+                )
+            ])
 
         return Response({"message": "You are marked as ready to donate."})
 
 
 
-class AcceptedDonorListView(ListAPIView):
-    serializer_class = AcceptedDonorSerializer
+class AcceptedDonorListView(ReplicaReadMixin, ListAPIView):
+    serializer_class = AcceptedDonorReadSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = AcceptedDonor.objects.filter(
+        return AcceptedDonor.objects.filter(
             request__requester=self.request.user,
             status="Pending"
-        ).select_related("donor", "request").order_by("-accepted_at")
+        ).order_by("-accepted_at")
+
+    def list(self, request, *args, **kwargs):
+        since = parse_since(request)
 
-        for obj in queryset:
-            print(obj.unique_id, obj.donor.username , obj.request.blood_group)
-        
-        return queryset
+        if since is None:
+            return super().list(request, *args, **kwargs)
+
+        cursor = next_cursor()
+        changed = self.get_serializer(
+            self.get_queryset().filter(updated_at__gt=since), many=True
+        ).data
+        moved = AcceptedDonor.objects.filter(
+            request__requester=request.user,
+            updated_at__gt=since
+        ).values_list("unique_id", flat=True)
+
+        return Response({
+            **delta(
+                changed,
+                moved,
+                tombstones("offer", since, owner_id=request.user.id),
+                key="unique_id",
+            ),
+            "cursor": cursor,
+        })
 
 class FinalizeDonorView(APIView):
     permission_classes = [IsAuthenticated]
@@ -73,18 +113,146 @@ class FinalizeDonorView(APIView):
                 status=400
             )
 
-        donor.status = "Finalized"
-        donor.save()
+        with transaction.atomic():
+            # locked and read again: of two concurrent finalize calls only
+            # the first gets past here, the second sees its result
+            req = Request.objects.select_for_update().get(id=req.id)
+            donor = AcceptedDonor.objects.select_for_update().get(id=donor.id)
+
+            if req.status == "Success":
+                return Response(
+                    {"error": "Request already finalized"},
+                    status=400
+                )
+
+            if donor.status != "Pending":
+                return Response(
+                    {"error": "Offer is no longer pending"},
+                    status=400
+                )
 
-        AcceptedDonor.objects.filter(
-            request=req
-        ).exclude(id=donor.id).update(status="Rejected")
+            others = AcceptedDonor.objects.filter(
+                request=req
+            ).exclude(id=donor.id)
 
-        req.status = "Success"
-        req.save()
+            # .update() fires no signals, so capture what the counters
+            # and the event log need
+            rejected = list(others.values_list("unique_id", "donor_id", "status"))
+
+            changes = [(donor.donor_id, donor.status, "Finalized")]
+            changes += [
+                (donor_id, status, "Rejected")
+                for _, donor_id, status in rejected
+            ]
+
+            events = [
+                event(
+                    "offer.status_changed", donor.unique_id, request.user.id,
+                    request=req.short_id, donor=donor.donor_id,
+                    old_status=donor.status, new_status="Finalized",
+                )
+            ]
+            events += [
+                event(
+                    "offer.status_changed", unique_id, request.user.id,
+                    request=req.short_id, donor=donor_id,
+                    old_status=status, new_status="Rejected",
+                )
+                for unique_id, donor_id, status in rejected
+            ]
+
+            donor.status = "Finalized"
+            donor.finalized_at = timezone.now()
+            donor.save()
+
+            # donor history is denormalized on the profile
+            Profile.objects.filter(user_id=donor.donor_id).update(
+                donation_count=F("donation_count") + 1,
+                last_donated=timezone.localdate(donor.finalized_at),
+                updated_at=timezone.now(),
+            )
+            # .update() skips the signals that drop the cached user
+            transaction.on_commit(lambda: users.invalidate(donor.donor_id))
+
+            others.update(status="Rejected", updated_at=timezone.now())
+
+            old_status = req.status
+            req.status = "Success"
+            req.save()
+
+            events.append(
+                event(
+                    "request.status_changed", req.short_id, request.user.id,
+                    old_status=old_status, new_status=req.status,
+                )
+            )
+
+            track_offers(changes)
+            track_requests([req], old_status=old_status)
+            append(events)
 
         return Response(
             {"message": "Donor finalized"},
             status=200
         )
 
+
+class RecommendedDonorsView(APIView):
+    """
+    Best donors for one of the requester's open requests, best first.
+
+    Scores are precomputed by the refresh_recommendations command (see
+    donations.recommendations); this only reads the top rows, leaving out
+    donors in their cooldown and donors who already accepted.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, short_id):
+        req = get_object_or_404(Request, short_id=short_id)
+
+        if req.requester != request.user:
+            return Response(
+                {"error": "Only requester can see recommendations"},
+                status=403
+            )
+
+        if req.status != "Pending":
+            return Response({"donors": []})
+
+        try:
+            limit = int(request.GET.get("limit", settings.RECOMMENDATION_LIMIT))
+        except ValueError:
+            raise ValidationError("limit must be an integer")
+
+        today = timezone.localdate()
+        rows = (
+            Recommendation.objects
+            .filter(request=req)
+            .filter(Q(eligible_from__isnull=True) | Q(eligible_from__lte=today))
+            .exclude(donor__donations__request=req)
+            .order_by("-score", "-donor_id")
+            .values(
+                "score",
+                "donor__username",
+                "donor__profile__blood_group",
+                "donor__profile__location",
+                "donor__profile__pincode",
+                "donor__profile__last_donated",
+                "donor__profile__donation_count",
+            )[:max(1, min(limit, settings.RECOMMENDATION_LIMIT))]
+        )
+
+        return Response({
+            "donors": [
+                {
+                    "username": row["donor__username"],
+                    "blood_group": row["donor__profile__blood_group"],
+                    "location": row["donor__profile__location"],
+                    "pincode": row["donor__profile__pincode"],
+                    "last_donated": DATE.to_representation(row["donor__profile__last_donated"]),
+                    "donation_count": row["donor__profile__donation_count"],
+                    "score": round(row["score"], 3),
+                }
+                for row in rows
+            ]
+        })
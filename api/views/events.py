@@ -0,0 +1,39 @@
+from django.conf import settings
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import ValidationError
+from donations.events import tail
+from api.serializers.base import DATETIME
+
+
+class EventTailView(APIView):
+    """
+    Read the event log incrementally.
+
+    ?after=<cursor>&kind=<kind>[&kind=...]&limit=N, oldest first. Pass the
+    returned cursor as ``after`` on the next call; it stays put while
+    there is nothing new.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            after = int(request.GET.get("after", 0))
+            limit = int(request.GET.get("limit", settings.EVENT_TAIL_LIMIT))
+        except ValueError:
+            raise ValidationError("after and limit must be integers")
+
+        events = list(tail(
+            after=after,
+            kinds=request.GET.getlist("kind"),
+            limit=max(1, min(limit, settings.EVENT_TAIL_LIMIT)),
+        ).values("id", "kind", "key", "actor_id", "data", "created_at"))
+
+        for e in events:
+            e["created_at"] = DATETIME.to_representation(e["created_at"])
+
+        return Response({
+            "events": events,
+            "cursor": events[-1]["id"] if events else after,
+        })
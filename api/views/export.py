@@ -0,0 +1,54 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from donations.export import export_rows, export_lines, iter_lines, aiter_lines, FORMATS
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportView(APIView):
+    """
+    Staff-only streaming dump of requests, offers or finalized donations.
+
+    ?output=csv|ndjson&status=...&since=YYYY-MM-DD&until=YYYY-MM-DD
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, dataset):
+        params = request.query_params
+        output = params.get("output", "csv")
+
+        if output not in FORMATS:
+            return Response({"error": f"output must be one of {FORMATS}"}, status=400)
+
+        try:
+            columns, rows = export_rows(
+                dataset,
+                status=params.get("status"),
+                since=params.get("since"),
+                until=params.get("until"),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        lines = export_lines(output, columns, rows)
+
+        # each handler streams its own kind of iterator without listing it
+        if isinstance(request._request, ASGIRequest):
+            lines = aiter_lines(lines)
+        else:
+            lines = iter_lines(lines)
+
+        response = StreamingHttpResponse(
+            lines,
+            content_type=CONTENT_TYPES[output]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{dataset}.{output}"'
+        )
+        return response
@@ -0,0 +1,59 @@
+from django.db import connections
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from bloodconnect.hashing import pool as hash_pool
+from chat.recent import recent
+
+
+class DatabasePoolMetricsView(APIView):
+    """Checkout wait and size counters of this process's connection pool."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        pool = getattr(connections["default"], "pool", None)
+
+        if pool is None:
+            return Response({"enabled": False})
+
+        stats = pool.get_stats()
+        queued = stats.get("requests_queued", 0)
+
+        return Response({
+            "enabled": True,
+            "pool_min": stats.get("pool_min"),
+            "pool_max": stats.get("pool_max"),
+            "pool_size": stats.get("pool_size"),
+            "pool_available": stats.get("pool_available"),
+            "requests_waiting": stats.get("requests_waiting"),
+            "requests_num": stats.get("requests_num", 0),
+            "requests_queued": queued,
+            "requests_wait_ms": stats.get("requests_wait_ms", 0),
+            "avg_wait_ms": stats.get("requests_wait_ms", 0) / queued if queued else 0,
+            "requests_errors": stats.get("requests_errors", 0),
+            "connections_num": stats.get("connections_num", 0),
+            "connections_lost": stats.get("connections_lost", 0),
+        })
+
+
+class PasswordHashMetricsView(APIView):
+    """Queue and timing counters of this process's password hashing pool."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        stats = hash_pool.get_stats()
+        num = stats["hashes_num"]
+
+        return Response({
+            **stats,
+            "avg_hash_ms": stats["hash_ms"] / num if num else 0,
+            "avg_wait_ms": stats["wait_ms"] / num if num else 0,
+        })
+
+
+class ChatRecentMetricsView(APIView):
+    """Hits and misses of this process's recent chat message buffers."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(recent.get_stats())
@@ -1,28 +1,32 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from api.serializers.profile import ProfileSerializer
+from api.mixins import ReplicaReadMixin
+from accounts.models import Profile
+from api.serializers.profile import ProfileSerializer, ProfileReadSerializer
 
-class MyProfileView(APIView):
+class MyProfileView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = ProfileSerializer(request.user.profile)
+        serializer = ProfileReadSerializer(
+            Profile.objects.filter(user=request.user)
+        )
         return Response(serializer.data)
 
     def put(self, request):
-        serializer = ProfileSerializer(
-            request.user.profile,
-            data=request.data,
-            partial=True
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
-    
+        return self.update(request)
+
     def patch(self, request):
+        return self.update(request)
+
+    def update(self, request):
+        # read fresh: request.user.profile may come from the user cache, and
+        # saving a stale copy would undo what FinalizeDonorView just wrote
+        profile = Profile.objects.select_related("user").get(user=request.user)
+
         serializer = ProfileSerializer(
-            request.user.profile,
+            profile,
             data=request.data,
             partial=True
         )
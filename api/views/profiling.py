@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.http import FileResponse, Http404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from bloodconnect import profiling
+
+
+class ProfileListView(APIView):
+    """
+    GET: the sample rate and the profiles stored on this host, newest first.
+    PUT {"rate": 0.01}: profile that share of requests from now on (0 stops).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "rate": profiling.sample_rate(),
+            "profiles": profiling.stored_profiles(),
+        })
+
+    def put(self, request):
+        try:
+            rate = float(request.data.get("rate"))
+        except (TypeError, ValueError):
+            rate = None
+
+        if rate is None or not 0 <= rate <= 1:
+            return Response({"rate": ["A number from 0 to 1 is required."]}, status=400)
+
+        profiling.set_sample_rate(rate)
+        return Response({"rate": rate})
+
+
+class ProfileTokenView(APIView):
+    """A value for the X-Profile header: requests carrying it are always profiled."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        return Response({
+            "header": profiling.HEADER,
+            "token": profiling.make_token(request.user),
+            "expires_in": settings.PROFILING_TOKEN_SECONDS,
+        })
+
+
+class ProfileDetailView(APIView):
+    """One stored profile as collapsed stacks (text/plain)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        path = profiling.profile_path(name)
+
+        if path is None:
+            raise Http404("No such profile.")
+
+        return FileResponse(open(path, "rb"), content_type="text/plain; charset=utf-8")
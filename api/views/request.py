@@ -1,7 +1,20 @@
-from rest_framework import generics
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Subquery
+from rest_framework import generics, serializers, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django_filters.rest_framework import DjangoFilterBackend
 from donations.models import Request
-from api.serializers.request import RequestSerializer
+from donations.counters import track_requests
+from donations.events import event, append
+from donations.signals import requests_created
+from api.serializers.request import RequestSerializer, RequestReadSerializer
+from api.filters import RequestFilter
+from api.mixins import ReplicaReadMixin
+from api.delta import parse_since, next_cursor, tombstones, delta
+from api.keyset import parse_page
 
 BLOOD_COMPATIBILITY = {
     "O-": ["O-"],
@@ -14,9 +27,77 @@ BLOOD_COMPATIBILITY = {
     "AB+": ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"],
 }
 
-class RequestListCreateView(generics.ListCreateAPIView):
+def feed_queryset(user, donor_blood):
+    qs = (
+        Request.objects
+        .filter(status="Pending")
+        .exclude(requester=user)
+        # newest first; (created_at, id) is the keyset, see feed_page
+        .order_by("-created_at", "-id")
+    )
+
+    # if donor has no blood group set → show nothing
+    if not donor_blood:
+        return qs.none()
+
+    # only compatible requests
+    return qs.filter(
+        blood_group__in=BLOOD_COMPATIBILITY.get(donor_blood, [])
+    )
+
+
+def feed_page(queryset, request):
+    before, limit = parse_page(request, settings.FEED_PAGE_MAX)
+
+    if before is not None:
+        # rows after the cursor row, in one query (a subquery, so this
+        # stays lazy for the async views); an unknown cursor gives no rows
+        cursor = Request.objects.filter(short_id=before)
+        created_at = Subquery(cursor.values("created_at")[:1])
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at)
+            | Q(created_at=created_at, id__lt=Subquery(cursor.values("id")[:1]))
+        )
+    if limit is not None:
+        queryset = queryset[:limit]
+    return queryset
+
+
+def request_created(blood_request):
+    return event(
+        "request.created",
+        blood_request.short_id,
+        blood_request.requester_id,
+        blood_group=blood_request.blood_group,
+        pincode=blood_request.pincode,
+        urgency=blood_request.urgency,
+    )
+
+
+def feed_moved(user, donor_blood, since):
+    # feed rows updated since, including ones that have left the feed
+    return (
+        Request.objects
+        .filter(
+            updated_at__gt=since,
+            blood_group__in=BLOOD_COMPATIBILITY.get(donor_blood, []),
+        )
+        .exclude(requester=user)
+        .values_list("short_id", flat=True)
+    )
+
+
+class RequestListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     serializer_class = RequestSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RequestFilter
+
+    def get_serializer_class(self):
+        # feed reads skip the ModelSerializer machinery
+        if self.request.method == "GET":
+            return RequestReadSerializer
+        return RequestSerializer
 
     def get_queryset(self):
         user = self.request.user
@@ -24,27 +105,105 @@ class RequestListCreateView(generics.ListCreateAPIView):
         # donor blood group
         donor_blood = getattr(user.profile, "blood_group", None)
 
-        qs = (
-            Request.objects
-            .filter(status="Pending")
-            .exclude(requester=user)
-            .order_by("-created_at")
-        )
+        return feed_queryset(user, donor_blood)
 
-        # if donor has no blood group set → show nothing
-        if not donor_blood:
-            return qs.none()
+    def list(self, request, *args, **kwargs):
+        since = parse_since(request)
 
-        # only compatible requests
-        return qs.filter(
-            blood_group__in=BLOOD_COMPATIBILITY.get(donor_blood, [])
-        )
+        if since is None:
+            queryset = feed_page(self.filter_queryset(self.get_queryset()), request)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        cursor = next_cursor()
+        user = request.user
+        donor_blood = getattr(user.profile, "blood_group", None)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        changed = self.get_serializer(
+            queryset.filter(updated_at__gt=since), many=True
+        ).data
+
+        return Response({
+            **delta(
+                changed,
+                feed_moved(user, donor_blood, since),
+                tombstones("request", since),
+                key="short_id",
+            ),
+            "cursor": cursor,
+        })
 
     def perform_create(self, serializer):
-        serializer.save(requester=self.request.user)
+        with transaction.atomic():
+            blood_request = serializer.save(requester=self.request.user)
+            track_requests([blood_request])
+            append([request_created(blood_request)])
 
 
-class RequestDetailView(generics.RetrieveAPIView):
+class RequestDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
     queryset = Request.objects.all()
     serializer_class = RequestSerializer
     lookup_field = "short_id"
+
+
+class RequestBulkCreateView(APIView):
+    """
+    Create many requests in one call (hospital blood banks).
+
+    Body is a list of request objects. Valid items are inserted with one
+    bulk_create, invalid ones are reported by their index.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        items = request.data
+
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty list of requests"},
+                status=400
+            )
+
+        if len(items) > settings.BULK_REQUEST_MAX:
+            return Response(
+                {"error": f"At most {settings.BULK_REQUEST_MAX} requests per batch"},
+                status=400
+            )
+
+        # one serializer instance validates the whole batch
+        validator = RequestSerializer(context={"request": request})
+        valid = []
+        errors = []
+
+        for index, item in enumerate(items):
+            try:
+                valid.append(validator.run_validation(item))
+            except serializers.ValidationError as exc:
+                errors.append({"index": index, "errors": exc.detail})
+
+        created = [
+            Request(requester=request.user, **data)
+            for data in valid
+        ]
+
+        if created:
+            with transaction.atomic():
+                Request.objects.bulk_create(created, batch_size=200)
+                track_requests(created)
+                append([request_created(r) for r in created])
+                requests_created.send(sender=Request, requests=created)
+
+        if not errors:
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            {
+                "created": [r.short_id for r in created],
+                "errors": errors,
+            },
+            status=code
+        )
@@ -0,0 +1,64 @@
+from django.db.models import Q, Sum
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from api.mixins import ReplicaReadMixin
+from donations.counters import PINCODE_PREFIX
+from donations.models import Request, AcceptedDonor, StatCounter
+
+
+class PendingStatsView(ReplicaReadMixin, APIView):
+    """Pending requests by blood group and pincode prefix, read from counters."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        blood_group = request.query_params.get("blood_group", "")
+        prefix = request.query_params.get("pincode_prefix", "")
+
+        groups = [g for g, _ in Request.BLOOD_GROUPS]
+
+        if blood_group and blood_group not in groups:
+            return Response({"error": "Unknown blood group"}, status=400)
+
+        if prefix and (len(prefix) > PINCODE_PREFIX or not prefix.isdigit()):
+            return Response(
+                {"error": f"pincode_prefix must be up to {PINCODE_PREFIX} digits"},
+                status=400
+            )
+
+        keys = Q()
+        for group in ([blood_group] if blood_group else groups):
+            keys |= Q(key__startswith=f"{group}:{prefix}")
+
+        pending = StatCounter.objects.filter(
+            keys, scope="pending"
+        ).aggregate(total=Sum("value"))["total"]
+
+        return Response({
+            "blood_group": blood_group or None,
+            "pincode_prefix": prefix or None,
+            "pending": pending or 0,
+        })
+
+
+class MyStatsView(ReplicaReadMixin, APIView):
+    """The current user's requests and offers by status."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user_id = request.user.id
+
+        data = {
+            "requests": {status: 0 for status, _ in Request.STATUS_CHOICES},
+            "offers": {status: 0 for status, _ in AcceptedDonor.STATUS_CHOICES},
+        }
+
+        counters = StatCounter.objects.filter(
+            Q(scope="requests") | Q(scope="offers"),
+            key__startswith=f"{user_id}:",
+        ).values_list("scope", "key", "value")
+
+        for scope, key, value in counters:
+            data[scope][key.split(":", 1)[1]] = value
+
+        return Response(data)
@@ -4,6 +4,7 @@ from django.core.asgi import get_asgi_application
 django_asgi_app = get_asgi_application()
 from channels.routing import ProtocolTypeRouter, URLRouter
 import chat.routing
+import donations.routing
 from chat.jwt_middleware import JWTAuthMiddleware
 
 
@@ -14,6 +15,7 @@ application = ProtocolTypeRouter({
     "websocket": JWTAuthMiddleware(
         URLRouter(
             chat.routing.websocket_urlpatterns
+            + donations.routing.websocket_urlpatterns
         )
     ),
 })
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""
+Broker process behind bloodconnect.channel_layer.LocalChannelLayer.
+
+Holds every channel queue and group of one host in memory and serves the
+worker processes over a Unix socket, so chat and feed events reach
+consumers in any worker without Redis. Semantics follow channels_redis:
+per-channel capacity (send raises ChannelFull, group_send skips full
+channels), messages expire after ``expiry`` seconds and take their
+channel out of all groups when they do, and group membership lapses
+``group_expiry`` seconds after the last group_add.
+
+Frames are a 4 byte length and msgpack, as channels_redis encodes its
+messages, so a frame can only ever decode to plain data. The socket must
+live in a directory only the user running the workers can enter
+(``check_private``), so no other local user can plant a socket there.
+Started on demand by the layer, or by hand:
+
+    python -m bloodconnect.channel_broker $XDG_RUNTIME_DIR/bloodconnect-channels.sock
+
+Only one broker runs per socket path (an flock on ``<path>.lock``), so
+workers racing to start it are harmless. This module does not import
+Django.
+"""
+import argparse
+import asyncio
+import collections
+import fcntl
+import os
+import re
+import stat
+import struct
+import time
+
+import msgpack
+
+HEADER = struct.Struct("!I")
+
+# how often expired messages and group memberships are swept
+SWEEP_SECONDS = 5
+
+# returned by ops that answer later (receive)
+WAIT = object()
+
+
+async def read_frame(reader):
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return msgpack.unpackb(await reader.readexactly(size), raw=False)
+
+
+def write_frame(writer, frame):
+    data = msgpack.packb(frame, use_bin_type=True)
+    writer.write(HEADER.pack(len(data)) + data)
+
+
+def check_private(path):
+    """
+    Raise PermissionError unless the directory of the socket ``path`` is
+    ours and closed to everyone else, and the socket, if there, is ours.
+    """
+    uid = os.getuid()
+    directory = os.path.dirname(os.path.abspath(path))
+    info = os.lstat(directory)
+
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o077:
+        raise PermissionError(f"{directory} must be a directory of uid {uid} with mode 0700")
+
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != uid:
+        raise PermissionError(f"{path} is not a socket of uid {uid}")
+
+
+class ChannelFullError(Exception):
+    pass
+
+
+class Client:
+    """One connected worker event loop and the layer config it sent."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.expiry = 60
+        self.group_expiry = 86400
+        self.capacity = 100
+        self.channel_capacity = []
+
+    def get_capacity(self, channel):
+        for pattern, capacity in self.channel_capacity:
+            if pattern.match(channel):
+                return capacity
+        return self.capacity
+
+
+class Broker:
+
+    def __init__(self, idle_exit=0):
+        # channel -> deque of (expires_at, message)
+        self.channels = {}
+        # channel -> deque of (client, request id) blocked in receive()
+        self.waiters = {}
+        # group -> {channel: membership expires_at}
+        self.groups = {}
+
+        self.clients = set()
+        self.idle_exit = idle_exit
+        self.idle_since = time.monotonic()
+
+    # ---------------- OPS ----------------
+
+    def op_configure(self, client, request_id, config):
+        client.expiry = config["expiry"]
+        client.group_expiry = config["group_expiry"]
+        client.capacity = config["capacity"]
+        client.channel_capacity = [
+            (re.compile(pattern), capacity)
+            for pattern, capacity in config["channel_capacity"]
+        ]
+
+    def op_send(self, client, request_id, channel, message):
+        if not self.deliver(channel, message, client.expiry, client.get_capacity(channel)):
+            raise ChannelFullError(channel)
+
+    def op_receive(self, client, request_id, channel):
+        queue = self.channels.get(channel)
+
+        if queue:
+            _, message = queue.popleft()
+            if not queue:
+                del self.channels[channel]
+            return message
+
+        self.waiters.setdefault(channel, collections.deque()).append((client, request_id))
+        return WAIT
+
+    def op_cancel(self, client, request_id, channel, receive_id):
+        waiters = self.waiters.get(channel)
+
+        if waiters:
+            try:
+                waiters.remove((client, receive_id))
+            except ValueError:
+                pass
+            if not waiters:
+                del self.waiters[channel]
+
+        return receive_id
+
+    def op_requeue(self, client, request_id, channel, message):
+        # a receive() cancelled after its message was already on the wire
+        if not self.deliver(channel, message, client.expiry, None, front=True):
+            raise ChannelFullError(channel)
+
+    def op_group_add(self, client, request_id, group, channel):
+        self.groups.setdefault(group, {})[channel] = time.monotonic() + client.group_expiry
+
+    def op_group_discard(self, client, request_id, group, channel):
+        members = self.groups.get(group)
+
+        if members:
+            members.pop(channel, None)
+            if not members:
+                del self.groups[group]
+
+    def op_group_send(self, client, request_id, group, message):
+        now = time.monotonic()
+
+        for channel, expires_at in list(self.groups.get(group, {}).items()):
+            if expires_at < now:
+                continue
+            # full channels are skipped, as in channels_redis
+            self.deliver(channel, message, client.expiry, client.get_capacity(channel))
+
+    def op_flush(self, client, request_id):
+        self.channels = {}
+        self.groups = {}
+
+    # ---------------- QUEUES ----------------
+
+    def deliver(self, channel, message, expiry, capacity, front=False):
+        waiters = self.waiters.get(channel)
+
+        while waiters:
+            waiter, request_id = waiters.popleft()
+            if not waiters:
+                del self.waiters[channel]
+            if not waiter.writer.is_closing():
+                write_frame(waiter.writer, (request_id, True, message))
+                return True
+
+        queue = self.channels.setdefault(channel, collections.deque())
+
+        if capacity is not None and len(queue) >= capacity:
+            self.expire(channel)
+            queue = self.channels.setdefault(channel, collections.deque())
+            if len(queue) >= capacity:
+                return False
+
+        entry = (time.monotonic() + expiry, message)
+        if front:
+            queue.appendleft(entry)
+        else:
+            queue.append(entry)
+        return True
+
+    def expire(self, channel):
+        queue = self.channels.get(channel)
+        now = time.monotonic()
+        expired = False
+
+        while queue and queue[0][0] < now:
+            queue.popleft()
+            expired = True
+
+        if expired:
+            # a consumer that stopped reading is dropped from its groups
+            for members in self.groups.values():
+                members.pop(channel, None)
+        if queue is not None and not queue:
+            del self.channels[channel]
+
+    def sweep(self):
+        for channel in list(self.channels):
+            self.expire(channel)
+
+        now = time.monotonic()
+        for group, members in list(self.groups.items()):
+            for channel, expires_at in list(members.items()):
+                if expires_at < now:
+                    del members[channel]
+            if not members:
+                del self.groups[group]
+
+    # ---------------- SERVER ----------------
+
+    async def serve(self, reader, writer):
+        client = Client(writer)
+        self.clients.add(client)
+
+        try:
+            while True:
+                request_id, op, args = await read_frame(reader)
+
+                try:
+                    result = getattr(self, "op_" + op)(client, request_id, *args)
+                except ChannelFullError as exc:
+                    write_frame(writer, (request_id, False, ("full", str(exc))))
+                else:
+                    if result is not WAIT:
+                        write_frame(writer, (request_id, True, result))
+
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(client)
+            if not self.clients:
+                self.idle_since = time.monotonic()
+
+            for channel, waiters in list(self.waiters.items()):
+                remaining = collections.deque(w for w in waiters if w[0] is not client)
+                if remaining:
+                    self.waiters[channel] = remaining
+                else:
+                    del self.waiters[channel]
+
+            writer.close()
+
+    async def run(self, path):
+        server = await asyncio.start_unix_server(self.serve, path)
+        os.chmod(path, 0o600)
+
+        async with server:
+            while True:
+                await asyncio.sleep(SWEEP_SECONDS)
+                self.sweep()
+
+                if (
+                    self.idle_exit
+                    and not self.clients
+                    and time.monotonic() - self.idle_since > self.idle_exit
+                ):
+                    break
+
+        os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument(
+        "--idle-exit",
+        type=float,
+        default=0,
+        help="Exit after this many seconds without clients (0: never).",
+    )
+    args = parser.parse_args()
+
+    check_private(args.path)
+
+    lock = open(args.path + ".lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        # another broker owns this socket
+        return
+
+    # left behind by a broker that died
+    if os.path.exists(args.path):
+        os.unlink(args.path)
+
+    asyncio.run(Broker(idle_exit=args.idle_exit).run(args.path))
+
+
+if __name__ == "__main__":
+    main()
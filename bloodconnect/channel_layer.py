@@ -0,0 +1,254 @@
+"""
+Channel layer shared by all worker processes on one host, without Redis.
+
+``LocalChannelLayer`` keeps no state itself: every call goes over a Unix
+socket to the broker process in bloodconnect.channel_broker, which holds
+the queues and groups for all workers. If the socket is not there the
+first worker to need it starts the broker (and the broker exits again
+after ``idle_exit`` seconds without workers). Settings::
+
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "bloodconnect.channel_layer.LocalChannelLayer",
+            "CONFIG": {"path": "/run/user/1000/bloodconnect-channels.sock"},
+        },
+    }
+
+The path defaults to ``bloodconnect-channels.sock`` in ``socket_dir()``.
+Its directory has to be private to the user running the workers (see
+channel_broker.check_private), and is checked before every connect.
+
+``expiry``, ``group_expiry``, ``capacity`` and ``channel_capacity`` mean
+the same as for channels_redis. Like Redis, the broker is a single point:
+if it restarts, queued messages and group memberships are lost and
+consumers rejoin their groups on reconnect.
+"""
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import uuid
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+from .channel_broker import check_private, read_frame, write_frame
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def socket_dir():
+    """$XDG_RUNTIME_DIR, else run/ in the project, created 0700."""
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(BASE_DIR, "run")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return directory
+
+
+class BrokerConnection:
+    """One socket to the broker, shared by every coroutine of an event loop."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+        self.futures = {}
+        # receive() calls given up while the broker may already have
+        # answered: request id -> channel, and cancel id -> request id
+        self.cancelled = {}
+        self.cancels = {}
+        self.closed = False
+        self.reader_task = asyncio.ensure_future(self.read_responses())
+
+    async def call(self, op, *args):
+        if self.closed:
+            raise ConnectionError("channel broker connection closed")
+
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.futures[request_id] = future
+
+        write_frame(self.writer, (request_id, op, args))
+
+        try:
+            await self.writer.drain()
+            return await future
+        except asyncio.CancelledError:
+            if self.futures.pop(request_id, None) is not None and op == "receive":
+                self.cancelled[request_id] = args[0]
+                if not self.closed:
+                    cancel_id = next(self.ids)
+                    self.cancels[cancel_id] = request_id
+                    write_frame(self.writer, (cancel_id, "cancel", (args[0], request_id)))
+            raise
+
+    async def read_responses(self):
+        error = None
+
+        try:
+            while True:
+                request_id, ok, result = await read_frame(self.reader)
+                future = self.futures.pop(request_id, None)
+
+                if future is None:
+                    self.answered_after_cancel(request_id, result)
+                elif future.done():
+                    pass
+                elif ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(ChannelFull(result[1]))
+        except Exception as exc:
+            error = exc
+        except asyncio.CancelledError:
+            error = ConnectionError("channel broker connection closed")
+        finally:
+            self.closed = True
+
+        for future in self.futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"channel broker went away: {error}"))
+        self.futures.clear()
+
+    def answered_after_cancel(self, request_id, result):
+        if request_id in self.cancels:
+            # the broker dropped the receive before anything arrived
+            self.cancelled.pop(self.cancels.pop(request_id), None)
+            return
+
+        channel = self.cancelled.pop(request_id, None)
+        if channel is not None and not self.closed:
+            # the message was already sent to us: give it back
+            write_frame(self.writer, (next(self.ids), "requeue", (channel, result)))
+
+    def close(self):
+        self.closed = True
+        self.reader_task.cancel()
+        self.writer.close()
+
+
+class LocalChannelLayer(BaseChannelLayer):
+
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        path=None,
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        idle_exit=300,
+        **kwargs,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.group_expiry = group_expiry
+        self.path = path or os.path.join(socket_dir(), "bloodconnect-channels.sock")
+        self.idle_exit = idle_exit
+        self.client_prefix = uuid.uuid4().hex[:12]
+
+        # async_to_sync() runs each call in a fresh event loop, so there
+        # is one connection per loop: loop -> future of a BrokerConnection
+        self.connections = {}
+
+    # ---------------- CONNECTION ----------------
+
+    async def connection(self):
+        loop = asyncio.get_running_loop()
+
+        for other in [l for l in self.connections if l.is_closed()]:
+            del self.connections[other]
+
+        pending = self.connections.get(loop)
+        if pending is None or pending.done() and (
+            pending.cancelled()
+            or pending.exception() is not None
+            or pending.result().closed
+        ):
+            # shared, so concurrent first calls open a single connection
+            pending = self.connections[loop] = asyncio.ensure_future(self.connect())
+
+        return await asyncio.shield(pending)
+
+    async def connect(self):
+        for attempt in range(100):
+            check_private(self.path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if attempt == 99:
+                    raise
+                # again now and then, in case a broker was shutting down
+                # (and holding the lock) when the first one was started
+                if attempt % 20 == 0:
+                    self.start_broker()
+                await asyncio.sleep(0.05)
+
+        conn = BrokerConnection(reader, writer)
+        await conn.call("configure", {
+            "expiry": self.expiry,
+            "group_expiry": self.group_expiry,
+            "capacity": self.capacity,
+            "channel_capacity": [
+                (pattern.pattern, capacity)
+                for pattern, capacity in self.channel_capacity
+            ],
+        })
+        return conn
+
+    def start_broker(self):
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "bloodconnect.channel_broker", self.path,
+                "--idle-exit", str(self.idle_exit),
+            ],
+            cwd=BASE_DIR,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    async def call(self, op, *args):
+        conn = await self.connection()
+        return await conn.call(op, *args)
+
+    # ---------------- CHANNEL LAYER API ----------------
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        await self.call("send", channel, message)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        return await self.call("receive", channel)
+
+    async def new_channel(self, prefix="specific."):
+        return f"{prefix}.{self.client_prefix}!{uuid.uuid4().hex}"
+
+    async def flush(self):
+        await self.call("flush")
+
+    async def close(self):
+        for pending in self.connections.values():
+            if pending.done() and not pending.cancelled() and pending.exception() is None:
+                pending.result().close()
+        self.connections = {}
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self.call("group_add", group, channel)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self.call("group_discard", group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_group_name(group)
+        await self.call("group_send", group, message)
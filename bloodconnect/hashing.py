@@ -0,0 +1,137 @@
+"""
+Password hashing in a bounded process pool.
+
+PBKDF2 is deliberately slow; run on the request thread, a burst of logins
+or registrations takes every core of the worker and starves unrelated
+traffic (chat, feeds) served by the same process. With
+``PooledPBKDF2PasswordHasher`` as the first PASSWORD_HASHERS entry every
+hash and verify runs in ``PASSWORD_HASH_WORKERS`` processes instead; the
+request thread only waits for the result.
+
+At most ``PASSWORD_HASH_QUEUE_MAX`` jobs wait behind the busy workers,
+anything beyond that is rejected at once with 503 instead of piling up
+(see HashingBusy). Hashes are the same ``pbkdf2_sha256`` ones Django
+writes, so existing passwords keep working. Pool processes are spawned,
+so scripts that hash need the usual ``if __name__ == "__main__"`` guard
+(manage.py, gunicorn and uvicorn have it).
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = "Too many sign-ins right now, try again shortly."
+    default_code = "hashing_busy"
+    # sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+def run_hasher(method, *args):
+    # runs in the pool process, with Django's own hasher
+    started = time.perf_counter()
+    result = getattr(PBKDF2PasswordHasher(), method)(*args)
+    return result, time.perf_counter() - started
+
+
+class HashPool:
+
+    def __init__(self, workers, queue_max):
+        self.workers = workers
+        self.queue_max = queue_max
+        self.executor = None
+        self.lock = threading.Lock()
+
+        self.in_flight = 0
+        self.hashes_num = 0
+        self.hashes_rejected = 0
+        self.hashes_errors = 0
+        self.hash_seconds = 0.0
+        self.hash_max_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                # spawn, not fork: the worker process runs threads and an
+                # event loop whose locks a forked child would inherit
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.executor
+
+    def run(self, method, *args):
+        if self.workers <= 0:
+            result, elapsed = run_hasher(method, *args)
+            self.record(elapsed, 0.0)
+            return result
+
+        with self.lock:
+            if self.in_flight >= self.workers + self.queue_max:
+                self.hashes_rejected += 1
+                raise HashingBusy()
+            self.in_flight += 1
+
+        submitted = time.perf_counter()
+
+        try:
+            executor = self.get_executor()
+            result, elapsed = executor.submit(run_hasher, method, *args).result()
+        except BrokenProcessPool:
+            # a pool process died; start a fresh pool on the next call
+            with self.lock:
+                self.hashes_errors += 1
+                if self.executor is executor:
+                    self.executor = None
+            raise
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        self.record(elapsed, time.perf_counter() - submitted - elapsed)
+        return result
+
+    def record(self, elapsed, waited):
+        with self.lock:
+            self.hashes_num += 1
+            self.hash_seconds += elapsed
+            self.hash_max_seconds = max(self.hash_max_seconds, elapsed)
+            self.wait_seconds += waited
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "queue_max": self.queue_max,
+                "in_flight": self.in_flight,
+                "hashes_num": self.hashes_num,
+                "hashes_rejected": self.hashes_rejected,
+                "hashes_errors": self.hashes_errors,
+                "hash_ms": self.hash_seconds * 1000,
+                "max_hash_ms": self.hash_max_seconds * 1000,
+                "wait_ms": self.wait_seconds * 1000,
+            }
+
+
+pool = HashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_max=settings.PASSWORD_HASH_QUEUE_MAX,
+)
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2PasswordHasher that does the work in the hashing pool."""
+
+    def encode(self, password, salt, iterations=None):
+        return pool.run("encode", password, salt, iterations)
+
+    def verify(self, password, encoded):
+        return pool.run("verify", password, encoded)
@@ -0,0 +1,194 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+from . import profiling
+from .routers import pin_to_primary, apin_to_primary
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, able to run in an async chain as well.
+
+    WhiteNoiseMiddleware is sync only, so under ASGI it would push every
+    request through a thread. Static files come from memory (the file
+    index built at startup), so looking one up needs no thread either.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # DEBUG: looks the file up on disk
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = self.serve(static_file, request)
+
+        # the file is read in one thread hop, as ASGIStaticFilesHandler does
+        content = response.streaming_content
+
+        async def acontent():
+            for part in await sync_to_async(list)(content):
+                yield part
+
+        response.streaming_content = acontent()
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin users who just made a write request to the primary database.
+
+    Runs natively in both modes so it never forces the ASGI handler to
+    push the whole middleware chain through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            pin_to_primary(user_id)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            await apin_to_primary(user_id)
+
+        return response
+
+    def writer_id(self, request, response):
+        # DRF copies the authenticated user back onto the Django request
+        user = getattr(request, "user", None)
+
+        if (
+            request.method not in SAFE_METHODS
+            and user is not None
+            and user.is_authenticated
+            and response.status_code < 400
+        ):
+            return user.id
+
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Profile the API requests picked by bloodconnect.profiling (a share of
+    requests, or a signed X-Profile header). Keep it last: under ASGI a
+    sync view runs in a worker thread, so process_view calls the view
+    itself to have that thread sampled too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # async too, so requests that are not profiled skip the thread hop
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile = self.start(request)
+        if profile is None:
+            return self.get_response(request)
+
+        try:
+            with profile.thread():
+                return self.get_response(request)
+        finally:
+            self.stop(request, profile)
+
+    async def __acall__(self, request):
+        profile = self.start(request)
+        if profile is None:
+            return await self.get_response(request)
+
+        try:
+            with profile.task():
+                return await self.get_response(request)
+        finally:
+            self.stop(request, profile)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, "profiling", None)
+
+        if (
+            profile is None
+            or iscoroutinefunction(view_func)
+            or profile.covers_current_thread()
+        ):
+            return None
+
+        return self.run_view(profile, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, "profiling", None)
+
+        if profile is None or iscoroutinefunction(view_func):
+            return None
+
+        # the thread Django would have run the view in
+        return await sync_to_async(self.run_view)(
+            profile, request, view_func, view_args, view_kwargs
+        )
+
+    def run_view(self, profile, request, view_func, view_args, view_kwargs):
+        with profile.thread():
+            response = view_func(request, *view_args, **view_kwargs)
+            # DRF responses render lazily; the JSON encoding belongs here
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            return response
+
+    def start(self, request):
+        if not request.path.startswith("/api/"):
+            return None
+
+        request.profiling = profiling.start(
+            f"{request.method} {request.path}",
+            request.headers.get(profiling.HEADER),
+        )
+        return request.profiling
+
+    def stop(self, request, profile):
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            # the route, so profiles of one endpoint share a name
+            profile.name = f"{request.method} {match.route}"
+        profile.stop()
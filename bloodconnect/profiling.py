@@ -0,0 +1,369 @@
+"""
+Opt-in sampling profiler for API views and chat socket handlers.
+
+A request (or websocket handler call) is profiled when the sample rate
+picks it, or when it carries an ``X-Profile`` header from
+POST /api/profiles/token/ (staff, signed, valid PROFILING_TOKEN_SECONDS).
+The rate is PROFILING_RATE unless set at runtime with PUT /api/profiles/,
+which lasts until it is set again, on every worker of the host.
+
+While a call is profiled a sampler thread records its stack every
+PROFILING_INTERVAL_MS from sys._current_frames(): the thread running a
+sync view, or for async code the handler's own task, with the coroutine
+stack it waits in (marked ``(waiting)``) while it is suspended. Calls
+shorter than the interval may get no samples and leave no file.
+
+Profiles are written to PROFILING_DIR as collapsed stacks, one
+``frame;frame;frame count`` line per stack (what flamegraph.pl and
+speedscope read), newest PROFILING_KEEP files kept, and listed by
+GET /api/profiles/. At most PROFILING_MAX_ACTIVE calls per process are
+profiled at once. Only the standard library is used.
+"""
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = "X-Profile"
+
+FILE_SUFFIX = ".collapsed"
+FILE_PATTERN = re.compile(r"^[0-9T]+-\d+-[A-Za-z0-9-]*\.collapsed$")
+
+# the runtime sample rate is reread from PROFILING_DIR this often
+RATE_CHECK_SECONDS = 5
+
+_signer = signing.TimestampSigner(salt="bloodconnect.profiling")
+
+
+# ---------------- WHEN ----------------
+
+_rate = (None, 0.0)
+
+
+def rate_path():
+    return os.path.join(settings.PROFILING_DIR, "rate")
+
+
+def sample_rate():
+    """Share of calls profiled: the runtime rate if one was set, else PROFILING_RATE."""
+    global _rate
+
+    rate, checked_at = _rate
+    now = time.monotonic()
+
+    if rate is None or now - checked_at > RATE_CHECK_SECONDS:
+        try:
+            with open(rate_path()) as f:
+                rate = float(f.read())
+        except (OSError, ValueError):
+            rate = settings.PROFILING_RATE
+        _rate = (rate, now)
+
+    return rate
+
+
+def set_sample_rate(rate):
+    global _rate
+
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    tmp = f"{rate_path()}.{os.getpid()}"
+
+    with open(tmp, "w") as f:
+        f.write(repr(float(rate)))
+    os.replace(tmp, rate_path())
+
+    _rate = (float(rate), time.monotonic())
+
+
+def make_token(user):
+    return _signer.sign(str(user.id))
+
+
+def valid_token(token):
+    try:
+        _signer.unsign(token, max_age=settings.PROFILING_TOKEN_SECONDS)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def scope_token(scope):
+    # websocket handshake header, for clients that can set one
+    name = HEADER.lower().encode()
+
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin1")
+    return None
+
+
+def start(name, token=None):
+    """A running Profile if this call is to be profiled, else None."""
+    if not (token and valid_token(token)):
+        rate = sample_rate()
+        if rate <= 0 or random.random() >= rate:
+            return None
+
+    return sampler.begin(name)
+
+
+# ---------------- SAMPLES ----------------
+
+def frame_name(frame):
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def await_stack(task):
+    # frames of the coroutines the suspended task is awaiting, oldest first
+    # (Task.get_stack() only gives the outermost one)
+    stack = []
+    awaitable = task.get_coro()
+
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+
+    return stack
+
+
+def thread_stack(frame):
+    # oldest first
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class Profile:
+
+    def __init__(self, name):
+        self.name = name
+        self.started = datetime.now(timezone.utc)
+        self.stacks = Counter()
+        self.lock = threading.Lock()
+        # thread id -> nesting depth, and (loop, task, thread id) of async code
+        self.threads = Counter()
+        self.tasks = []
+
+    def thread(self):
+        return _Target(self, "thread")
+
+    def task(self):
+        return _Target(self, "task")
+
+    def covers_current_thread(self):
+        with self.lock:
+            return threading.get_ident() in self.threads
+
+    def sample(self, frames):
+        with self.lock:
+            threads = list(self.threads)
+            tasks = list(self.tasks)
+
+        for thread_id in threads:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.record(thread_stack(frame))
+
+        for loop, task, thread_id in tasks:
+            if asyncio.current_task(loop) is task:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.record(self.from_task_root(thread_stack(frame), task))
+            elif not threads and not task.done():
+                # suspended, and not waiting on a profiled thread either
+                stack = await_stack(task)
+                if stack:
+                    self.record(stack, waiting=True)
+
+    def from_task_root(self, stack, task):
+        # drop the event loop frames, so running and waiting samples line up
+        code = getattr(task.get_coro(), "cr_code", None)
+
+        for i, frame in enumerate(stack):
+            if frame.f_code is code:
+                return stack[i:]
+        return stack
+
+    def record(self, stack, waiting=False):
+        names = [frame_name(frame) for frame in stack]
+        if waiting:
+            names.append("(waiting)")
+        self.stacks[";".join(names)] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def file_name(self):
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", self.name).strip("-")[:80]
+        return f"{self.started:%Y%m%dT%H%M%S%f}-{os.getpid()}-{slug}{FILE_SUFFIX}"
+
+    def stop(self):
+        sampler.end(self)
+
+
+class _Target:
+
+    def __init__(self, profile, kind):
+        self.profile = profile
+        self.kind = kind
+
+    def __enter__(self):
+        with self.profile.lock:
+            if self.kind == "thread":
+                self.profile.threads[threading.get_ident()] += 1
+            else:
+                self.entry = (
+                    asyncio.get_running_loop(),
+                    asyncio.current_task(),
+                    threading.get_ident(),
+                )
+                self.profile.tasks.append(self.entry)
+        return self.profile
+
+    def __exit__(self, *exc):
+        with self.profile.lock:
+            if self.kind == "thread":
+                thread_id = threading.get_ident()
+                self.profile.threads[thread_id] -= 1
+                if not self.profile.threads[thread_id]:
+                    del self.profile.threads[thread_id]
+            else:
+                self.profile.tasks.remove(self.entry)
+
+
+# ---------------- SAMPLER ----------------
+
+class Sampler:
+    """One daemon thread per process, sampling while any profile is active."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = []
+        self.finished = []
+        self.wake = threading.Event()
+        self.thread = None
+
+    def begin(self, name):
+        with self.lock:
+            if len(self.active) >= settings.PROFILING_MAX_ACTIVE:
+                return None
+
+            profile = Profile(name)
+            self.active.append(profile)
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="profiling-sampler", daemon=True
+                )
+                self.thread.start()
+
+        self.wake.set()
+        return profile
+
+    def end(self, profile):
+        with self.lock:
+            if profile in self.active:
+                self.active.remove(profile)
+                # written by the sampler thread, off the request path
+                self.finished.append(profile)
+        self.wake.set()
+
+    def run(self):
+        interval = settings.PROFILING_INTERVAL_MS / 1000
+
+        while True:
+            self.wake.wait()
+
+            with self.lock:
+                active = list(self.active)
+                finished, self.finished = self.finished, []
+                if not active and not finished:
+                    self.wake.clear()
+
+            if active:
+                frames = sys._current_frames()
+                for profile in active:
+                    try:
+                        profile.sample(frames)
+                    except Exception:
+                        # a stack that changed while being read; skip it
+                        pass
+                del frames
+
+            for profile in finished:
+                save(profile)
+
+            if active:
+                time.sleep(interval)
+
+
+def save(profile):
+    if not profile.stacks:
+        return
+
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILING_DIR, profile.file_name())
+
+    with open(path, "w") as f:
+        f.write(profile.collapsed())
+
+    # rotation: file names start with the time, so sorting is oldest first
+    names = sorted(n for n in os.listdir(settings.PROFILING_DIR) if FILE_PATTERN.match(n))
+    for name in names[:-settings.PROFILING_KEEP]:
+        try:
+            os.unlink(os.path.join(settings.PROFILING_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def stored_profiles():
+    """Profiles on disk, newest first."""
+    try:
+        names = [n for n in os.listdir(settings.PROFILING_DIR) if FILE_PATTERN.match(n)]
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for name in sorted(names, reverse=True):
+        try:
+            stat = os.stat(os.path.join(settings.PROFILING_DIR, name))
+        except FileNotFoundError:
+            continue
+        stamp, pid, label = name[:-len(FILE_SUFFIX)].split("-", 2)
+        profiles.append({
+            "file": name,
+            "name": label,
+            "pid": int(pid),
+            "started": datetime.strptime(stamp, "%Y%m%dT%H%M%S%f").replace(tzinfo=timezone.utc),
+            "size": stat.st_size,
+        })
+
+    return profiles
+
+
+def profile_path(name):
+    """Path of the stored profile ``name``, or None if there is no such profile."""
+    if not FILE_PATTERN.match(name):
+        return None
+
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+sampler = Sampler()
@@ -0,0 +1,173 @@
+"""
+Token-bucket rate limiting shared by the DRF views and the chat consumer.
+
+Limits are configured per scope in ``settings.RATE_LIMITS``::
+
+    RATE_LIMITS = {"accept": {"user": "10/m", "ip": "30/m"}}
+
+"N/period" allows a burst of N and refills N tokens per period
+(s, m, h or d). Buckets live in process memory by default; set
+``RATE_LIMIT_BACKEND = "cache"`` to share them through the Django cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def scope_ip(scope):
+    """Client IP of a websocket scope, trusting NUM_PROXIES proxies like DRF's get_ident."""
+    client = scope.get("client")
+    remote_addr = client[0] if client else None
+    num_proxies = settings.REST_FRAMEWORK.get("NUM_PROXIES")
+
+    if num_proxies == 0:
+        return remote_addr
+
+    for key, value in scope.get("headers", []):
+        if key == b"x-forwarded-for":
+            xff = value.decode("latin1")
+
+            # unset: DRF keys on the whole header
+            if num_proxies is None:
+                return "".join(xff.split())
+
+            addrs = xff.split(",")
+            return addrs[-min(num_proxies, len(addrs))].strip()
+
+    return remote_addr
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def refilled(state, capacity, refill, now):
+    tokens, last = state or (capacity, now)
+    return min(capacity, tokens + (now - last) * refill)
+
+
+def shortfall(levels):
+    """Seconds until every (tokens, refill) bucket has a token, 0 if all do."""
+    return max(
+        ((1 - tokens) / refill for tokens, refill in levels if tokens < 1),
+        default=0.0,
+    )
+
+
+class LocalBuckets:
+    """In-process buckets, LRU-bounded to ``max_keys`` entries."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, buckets):
+        """
+        Take a token from each of ``buckets`` ((key, capacity, refill)), or
+        from none of them if one is empty. Returns the wait as for check().
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            levels = []
+            for key, capacity, refill in buckets:
+                state = self.buckets.pop(key, None)
+                levels.append((refilled(state, capacity, refill, now), refill))
+
+            wait = shortfall(levels)
+
+            for (key, _, _), (tokens, _) in zip(buckets, levels):
+                self.buckets[key] = (tokens if wait else tokens - 1, now)
+
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+
+        return wait
+
+
+class CacheBuckets:
+    """
+    Buckets in a shared Django cache. The read-modify-write is not atomic,
+    so concurrent workers may let a few extra requests through.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, buckets):
+        now = time.time()
+        keys = [f"ratelimit:{key}" for key, _, _ in buckets]
+        states = self.cache.get_many(keys)
+
+        levels = []
+        for key, (_, capacity, refill) in zip(keys, buckets):
+            levels.append((refilled(states.get(key), capacity, refill, now), refill))
+
+        wait = shortfall(levels)
+
+        # a bucket left alone long enough is full again, let it expire
+        self.cache.set_many(
+            {
+                key: (tokens if wait else tokens - 1, now)
+                for key, (tokens, _) in zip(keys, levels)
+            },
+            timeout=max(int(capacity / refill) + 1 for _, capacity, refill in buckets),
+        )
+        return wait
+
+
+_store = None
+
+
+def get_store():
+    global _store
+
+    if _store is None:
+        if settings.RATE_LIMIT_BACKEND == "cache":
+            _store = CacheBuckets(settings.RATE_LIMIT_CACHE)
+        else:
+            _store = LocalBuckets(settings.RATE_LIMIT_MAX_KEYS)
+
+    return _store
+
+
+def check(scope, **idents):
+    """
+    Take one token from every bucket configured for ``scope``, keyed by the
+    matching identity (``user=...``, ``ip=...``). Returns 0 when allowed,
+    otherwise the seconds until every bucket has a token; a refused request
+    takes nothing, so one empty bucket doesn't drain the others.
+    """
+    limits = settings.RATE_LIMITS.get(scope)
+
+    if not limits:
+        return 0.0
+
+    buckets = [
+        (f"{scope}:{kind}:{idents[kind]}", *parse_rate(rate))
+        for kind, rate in limits.items()
+        if idents.get(kind) is not None
+    ]
+
+    if not buckets:
+        return 0.0
+
+    return get_store().take(buckets)
+
+
+async def acheck(scope, **idents):
+    # the local store is a dict lookup; only a shared cache needs a thread hop
+    if isinstance(get_store(), LocalBuckets):
+        return check(scope, **idents)
+    return await sync_to_async(check)(scope, **idents)
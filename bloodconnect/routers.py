@@ -0,0 +1,75 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only inside ``read_from_replica()`` (used by the
+read-only API views and the chat consumer's lookups); everything else,
+and every write, uses ``default``. A user who has just written is pinned
+to the primary for ``REPLICA_STICKY_SECONDS`` so they never read their
+own stale data.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def pin_key(user_id):
+    return f"db-primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    if settings.DATABASE_REPLICAS and user_id is not None:
+        cache.set(pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    if settings.DATABASE_REPLICAS and user_id is not None:
+        await cache.aset(pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    if not settings.DATABASE_REPLICAS or user_id is None:
+        return False
+    return cache.get(pin_key(user_id), False)
+
+
+async def ais_pinned(user_id):
+    if not settings.DATABASE_REPLICAS or user_id is None:
+        return False
+    return await cache.aget(pin_key(user_id), False)
+
+
+@contextmanager
+def read_from_replica(user_id=None, pinned=None):
+    # async callers look the pin up with ais_pinned() and pass it in
+    if pinned is None:
+        pinned = is_pinned(user_id)
+
+    if not settings.DATABASE_REPLICAS or pinned:
+        yield
+        return
+
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
@@ -71,7 +71,8 @@ TEMPLATES = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, sync and async capable
+    "bloodconnect.middleware.StaticFilesMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -79,6 +80,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "bloodconnect.middleware.ReadYourWritesMiddleware",
+    # last, see the class
+    "bloodconnect.middleware.ProfilingMiddleware",
 ]
 
 
@@ -109,6 +113,53 @@ DATABASES = {
     )
 }
 
+# Read replicas, as comma separated database URLs
+# (e.g. sqlite:///replica.sqlite3 to try it locally).
+REPLICA_DATABASE_URLS = [
+    url for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url
+]
+
+DATABASE_REPLICAS = []
+
+for index, url in enumerate(REPLICA_DATABASE_URLS, start=1):
+    alias = f"replica{index}"
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600)
+    # tests read through the primary's test database
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["bloodconnect.routers.ReplicaRouter"]
+
+# after a write, that user's reads stay on the primary for this long
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "15"))
+
+# Bounded psycopg 3 pool for PostgreSQL. Under the uvicorn worker every
+# sync_to_async thread would otherwise keep its own persistent connection;
+# with the pool they share at most DB_POOL_MAX_SIZE per database and process.
+# DB_POOL_MAX_SIZE=0 turns pooling off and keeps persistent connections.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+for database in DATABASES.values():
+    if (
+        database.get("ENGINE") != "django.db.backends.postgresql"
+        or DB_POOL_MAX_SIZE <= 0
+    ):
+        continue
+
+    # pooled connections are returned after each request instead of kept
+    database["CONN_MAX_AGE"] = 0
+    # Django passes ConnectionPool.check_connection to the pool when set
+    database["CONN_HEALTH_CHECKS"] = True
+    database.setdefault("OPTIONS", {})["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        # max wait for a free connection before PoolTimeout
+        "timeout": DB_POOL_TIMEOUT,
+        "max_idle": 300,
+    }
+
 
 # ===============================
 # PASSWORD VALIDATION
@@ -122,6 +173,26 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# ===============================
+# PASSWORD HASHING
+# ===============================
+
+# pbkdf2_sha256 runs in a process pool, see bloodconnect/hashing.py;
+# the other entries only verify hashes written elsewhere
+PASSWORD_HASHERS = [
+    "bloodconnect.hashing.PooledPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# 0 hashes on the request thread (no pool)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# jobs allowed to wait for a busy worker before new ones get 503
+PASSWORD_HASH_QUEUE_MAX = int(os.getenv("PASSWORD_HASH_QUEUE_MAX", "32"))
+
+
 
 
 
@@ -132,19 +203,53 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # only views that set throttle_scope are limited, see RATE_LIMITS
+    "DEFAULT_THROTTLE_CLASSES": (
+        "api.throttling.TokenBucketThrottle",
+    ),
+    # proxies in front of the app; set it behind one (1 on Render) so the
+    # client IP is what the last proxy put in X-Forwarded-For, the rest of
+    # that header is up to the client. Unset keeps DRF's default
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES")) if os.getenv("NUM_PROXIES") else None,
 }
 
+# authenticated users (with profile) cached per process, see accounts/cache.py;
+# the TTL bounds how long other workers may see a stale user
+AUTH_USER_CACHE_SIZE = 10_000
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 60))
+
 
 # ===============================
-# CHANNELS (REDIS REQUIRED)
+# RATE LIMITING
 # ===============================
 
-if DEBUG is False:
+# "local" (per process) or "cache" (shared through CACHES[RATE_LIMIT_CACHE])
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local")
+RATE_LIMIT_CACHE = "default"
+RATE_LIMIT_MAX_KEYS = 100_000
+
+# scope -> {"user" | "ip": "N/period"}; N is the burst, refilled every period
+RATE_LIMITS = {
+    "register": {"ip": "5/h"},
+    "login": {"ip": "20/m"},
+    "accept": {"user": "10/m", "ip": "30/m"},
+    # websocket scopes: connects, saved chat messages, room subscribes
+    "ws:connect": {"user": "30/m", "ip": "60/m"},
+    "ws:message": {"user": "30/m"},
+    "ws:subscribe": {"user": "60/m"},
+}
+
+
+# ===============================
+# CHANNELS
+# ===============================
+
+if DEBUG is False and os.getenv("REDIS_URL"):
     
     CHANNEL_LAYERS = {
         "default": {
@@ -155,13 +260,118 @@ if DEBUG is False:
         },
     }
 else:
+    # shared by every worker on this host through a broker process,
+    # started on demand (bloodconnect/channel_layer.py)
     CHANNEL_LAYERS = { 
         "default": { 
-            "BACKEND": "channels.layers.InMemoryChannelLayer", 
+            "BACKEND": "bloodconnect.channel_layer.LocalChannelLayer", 
+            "CONFIG": {
+                "path": os.getenv("CHANNEL_SOCKET"),
+            },
         },
     }
 
 
+# ===============================
+# DONATIONS
+# ===============================
+
+# largest batch accepted by POST /api/requests/bulk/
+BULK_REQUEST_MAX = int(os.getenv("BULK_REQUEST_MAX", "500"))
+
+# largest ?limit= page of the request feed (?before=<short_id> for the next)
+FEED_PAGE_MAX = 100
+
+# ?since= syncs hand out a cursor this far in the past, so rows from
+# transactions that commit late are not skipped (clients see a few twice)
+SYNC_OVERLAP_SECONDS = 5
+
+# donations.events.tail() holds back events younger than this, so ids
+# from transactions that are still committing are not skipped
+EVENT_TAIL_SETTLE_SECONDS = 2
+# largest page of GET /api/events/
+EVENT_TAIL_LIMIT = 1000
+
+# days after last_donated before a donor is recommended again
+DONATION_COOLDOWN_DAYS = int(os.getenv("DONATION_COOLDOWN_DAYS", "90"))
+# donors stored per open request by donations.recommendations
+RECOMMENDATION_KEEP = 100
+# largest page of GET /api/requests/<short_id>/recommendations/
+RECOMMENDATION_LIMIT = 20
+
+# email/SMS alerts for new requests, see donations/notifications.py;
+# provider classes per channel (dotted paths)
+NOTIFICATION_PROVIDERS = {
+    "email": "donations.notifications.EmailProvider",
+    "sms": "donations.notifications.FileProvider",
+}
+# where FileProvider appends <channel>.jsonl
+NOTIFICATION_FILE_DIR = os.getenv("NOTIFICATION_FILE_DIR", os.path.join(BASE_DIR, "outbox"))
+# best recommended donors alerted per request
+NOTIFICATION_RECIPIENTS = 20
+# non-urgent requests reach a donor at most this often, as one summary
+NOTIFICATION_DIGEST_MINUTES = int(os.getenv("NOTIFICATION_DIGEST_MINUTES", "360"))
+# rows claimed per provider round
+NOTIFICATION_BATCH = 200
+# retries back off from NOTIFICATION_RETRY_SECONDS, doubling each time
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_SECONDS = 30
+
+
+# ===============================
+# EMAIL
+# ===============================
+
+# smtp on localhost by default; EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend
+# with EMAIL_FILE_PATH writes mails to files instead
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS") == "True"
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", os.path.join(BASE_DIR, "outbox", "email"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "BloodConnect <noreply@localhost>")
+
+
+# ===============================
+# CHAT
+# ===============================
+
+# window in which events are merged into one frame (?protocol=batch)
+CHAT_COALESCE_WINDOW_MS = int(os.getenv("CHAT_COALESCE_WINDOW_MS", "5"))
+
+# frames a single connection may have queued before it is closed
+CHAT_SEND_QUEUE_MAX = int(os.getenv("CHAT_SEND_QUEUE_MAX", "256"))
+
+# largest ?limit= page of chat history (?before=<message id> for older)
+CHAT_PAGE_MAX = 200
+
+# rooms one ws/chat/ connection may be subscribed to at once
+CHAT_MUX_ROOMS_MAX = 200
+
+# last messages kept in memory per active room for the first history page
+# (chat/recent.py), and how many rooms per process; 0 rooms turns it off
+CHAT_RECENT_MESSAGES = 50
+CHAT_RECENT_ROOMS = int(os.getenv("CHAT_RECENT_ROOMS", "1000"))
+
+
+# ===============================
+# PROFILING
+# ===============================
+
+# sampling profiler for API requests and chat sockets (bloodconnect/profiling.py);
+# share of calls profiled, changeable at runtime with PUT /api/profiles/
+PROFILING_RATE = float(os.getenv("PROFILING_RATE", "0"))
+PROFILING_INTERVAL_MS = 5
+# X-Profile tokens from POST /api/profiles/token/ are valid this long
+PROFILING_TOKEN_SECONDS = 3600
+PROFILING_MAX_ACTIVE = 4
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, "profiles"))
+# newest profiles kept on disk
+PROFILING_KEEP = 200
+
+
 # ===============================
 # INTERNATIONALIZATION
 # ===============================
@@ -176,6 +386,7 @@ USE_TZ = True
 # STATIC FILES
 # ===============================
 
+# served by WhiteNoise (bloodconnect.middleware.StaticFilesMiddleware)
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
@@ -1,3 +1,15 @@
 from django.contrib import admin
+from bloodconnect.admin import LargeTableAdmin
+from .models import ChatMessage
 
 # Register your models here.
+
+
+@admin.register(ChatMessage)
+class ChatMessageAdmin(LargeTableAdmin):
+    list_display = ("id", "room", "sender", "message", "timestamp")
+    # the room column is AcceptedDonor.__str__, which walks these
+    list_select_related = ("sender", "room__request__requester", "room__donor")
+    search_fields = ("=room__unique_id", "=sender__username")
+    raw_id_fields = ("room",)
+    autocomplete_fields = ("sender",)
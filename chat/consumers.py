@@ -1,24 +1,66 @@
-import json
+import asyncio
+from urllib.parse import parse_qs
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from bloodconnect import profiling, ratelimit
+from bloodconnect.routers import read_from_replica, pin_to_primary
+from donations.events import event, append
+from . import protocol
+from .recent import recent, broadcast_entry, received_entry
 
 
+def room_group(room_id):
+    return f"chat_{room_id}"
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
 
+    async def dispatch(self, message):
+        # every handler call can be profiled, see bloodconnect/profiling.py
+        profile = profiling.start(
+            f"ws {self.__class__.__name__} {message['type']}",
+            profiling.scope_token(self.scope),
+        )
+        if profile is None:
+            return await super().dispatch(message)
+
+        try:
+            with profile.task():
+                return await super().dispatch(message)
+        finally:
+            profile.stop()
+
     async def connect(self):
-        print('connect called !')
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
-        self.room_group_name = f"chat_{self.room_id}"
-        self.user = self.scope["user"]
+        self.room_group_name = room_group(self.room_id)
+        self.user = self.scope.get("user")
+        # rooms joined by this connection: unique_id -> AcceptedDonor id
+        self.rooms = {}
 
-        if not self.user.is_authenticated:
+        # ?protocol=batch → events are coalesced into array frames
+        query = parse_qs(self.scope["query_string"].decode())
+        self.coalesce = query.get("protocol", [""])[0] == "batch"
+        self.pending_frames = []
+        self.flush_task = None
+
+        if self.user is None or not self.user.is_authenticated:
             await self.close()
             return
 
-        is_allowed = await self.is_user_allowed()
+        if await ratelimit.acheck(
+            "ws:connect", user=self.user.id, ip=self.client_ip()
+        ):
+            # accept first so the client actually receives the close code
+            await self.accept()
+            await self.close(code=4429)
+            return
+
+        allowed = await self.allowed_rooms([self.room_id])
 
-        if not is_allowed:
+        if not allowed:
             await self.close()
             return
 
@@ -26,69 +68,263 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        self.rooms = allowed
+        recent.watch(self.room_id)
 
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+
+        for room_id in getattr(self, "rooms", {}):
+            await self.channel_layer.group_discard(
+                room_group(room_id),
+                self.channel_name
+            )
+            recent.unwatch(room_id)
 
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = protocol.loads(text_data)
         message = data.get("message")
 
         if not message:
             return
 
-        await self.save_message(message)
+        await self.send_message(self.room_id, message)
+
+    async def send_message(self, room_id, message):
+        # every saved message is charged, whatever "type" the client sent
+        wait = await ratelimit.acheck(
+            "ws:message",
+            user=self.user.id,
+            ip=self.client_ip(),
+        )
+        if wait:
+            await self.send(text_data=protocol.dumps({
+                "error": "rate_limited",
+                "room": room_id,
+                "retry_after": round(wait, 2),
+            }))
+            return
+
+        chat_message = await self.save_message(room_id, message)
+
+        # serialized once here, every member just forwards the frame
+        frame = protocol.dumps({
+            "room": room_id,
+            "message": message,
+            "username": self.user.username,
+            "sender_id": self.user.id,
+        })
 
         await self.channel_layer.group_send(
-            self.room_group_name,
+            room_group(room_id),
             {
                 "type": "chat_message",
-                "message": message,
-                "username": self.user.username,
-                "sender_id": self.user.id,
+                "frame": frame,
+                # for chat.recent in every process with a socket in the room
+                "room": room_id,
+                "entry": broadcast_entry(chat_message, self.user),
             }
         )
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps(event))
+        if "entry" in event:
+            recent.add(event["room"], received_entry(event["entry"]))
+
+        # both modes queue here, sent by flush_frames off the handler;
+        # slow client → drop the connection instead of buffering forever
+        if self.pending_frames is None:
+            # already closing
+            return
+
+        if len(self.pending_frames) >= settings.CHAT_SEND_QUEUE_MAX:
+            self.pending_frames = None
+            await self.close(code=1013)
+            return
+
+        self.pending_frames.append(event["frame"])
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_frames())
+
+    async def chat_discard(self, event):
+        # a message of the room was edited or deleted, see chat/signals.py
+        recent.discard(event["room"])
+
+    async def flush_frames(self):
+        if self.coalesce:
+            await asyncio.sleep(settings.CHAT_COALESCE_WINDOW_MS / 1000)
+
+        # frames queued while a send is in flight go out in the next round
+        while self.pending_frames:
+            if self.coalesce:
+                frames, self.pending_frames = self.pending_frames, []
+                await self.send(text_data=protocol.batch(frames))
+            else:
+                await self.send(text_data=self.pending_frames.pop(0))
+
+        self.flush_task = None
+
+    def client_ip(self):
+        return ratelimit.scope_ip(self.scope)
 
     # ---------------- DATABASE ----------------
 
     @database_sync_to_async
-    def is_user_allowed(self):
+    def allowed_rooms(self, room_ids):
+        """The rooms among ``room_ids`` the user is requester or donor of: unique_id -> id."""
         from donations.models import AcceptedDonor
-        from .models import ChatMessage        
-        try:
-            room = AcceptedDonor.objects.select_related(
-                "request", "donor"
-            ).get(unique_id=self.room_id)
 
-            # requester allowed
-            if room.request.requester == self.user:
-                return True
+        rooms = (
+            AcceptedDonor.objects
+            .filter(Q(request__requester_id=self.user.id) | Q(donor_id=self.user.id))
+            .values_list("unique_id", "id")
+        )
 
-            # donor allowed
-            if room.donor == self.user:
-                return True
+        with read_from_replica(self.user.id):
+            allowed = dict(rooms.filter(unique_id__in=room_ids))
 
-            return False
+        missing = set(room_ids) - set(allowed)
+        if missing and settings.DATABASE_REPLICAS:
+            # a brand new room may not have reached the replica yet
+            allowed.update(rooms.using("default").filter(unique_id__in=missing))
 
-        except AcceptedDonor.DoesNotExist:
-            return False
+        return allowed
 
     @database_sync_to_async
-    def save_message(self, message):
-        from donations.models import AcceptedDonor
+    def save_message(self, room_id, message):
         from .models import ChatMessage
-        room = AcceptedDonor.objects.get(unique_id=self.room_id)
 
-        ChatMessage.objects.create(
-            room=room,
-            sender=self.user,
-            message=message
-        )
\ No newline at end of file
+        with transaction.atomic():
+            chat_message = ChatMessage.objects.create(
+                room_id=self.rooms[room_id],
+                sender=self.user,
+                message=message
+            )
+            append([
+                event(
+                    "message.sent", room_id, self.user.id,
+                    message_id=chat_message.id,
+                )
+            ])
+
+        # the sender's next history read must see this message
+        pin_to_primary(self.user.id)
+
+        return chat_message
+
+
+class MultiplexChatConsumer(ChatConsumer):
+    """
+    All of a user's chat rooms over one socket (ws/chat/). The client
+    subscribes to rooms by unique_id and every frame names its room:
+
+        → {"type": "subscribe", "rooms": ["<unique_id>", ...]}
+        ← {"type": "subscribed", "rooms": [...], "denied": [...]}
+        → {"type": "unsubscribe", "rooms": [...]}
+        ← {"type": "unsubscribed", "rooms": [...]}
+        → {"type": "message", "room": "<unique_id>", "message": "..."}
+        ← {"room": "<unique_id>", "message": "...", "username": "...", "sender_id": 1}
+
+    A subscribe checks all its rooms with one query. ?protocol=batch works
+    as on the per-room socket.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        self.rooms = {}
+
+        query = parse_qs(self.scope["query_string"].decode())
+        self.coalesce = query.get("protocol", [""])[0] == "batch"
+        self.pending_frames = []
+        self.flush_task = None
+
+        if self.user is None or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        if await ratelimit.acheck(
+            "ws:connect", user=self.user.id, ip=self.client_ip()
+        ):
+            await self.accept()
+            await self.close(code=4429)
+            return
+
+        await self.accept()
+
+    async def receive(self, text_data):
+        data = protocol.loads(text_data)
+        kind = data.get("type", "message")
+
+        if kind == "subscribe":
+            await self.subscribe(data.get("rooms"))
+        elif kind == "unsubscribe":
+            await self.unsubscribe(data.get("rooms"))
+        elif kind == "message":
+            room_id = data.get("room")
+            message = data.get("message")
+
+            if not message:
+                return
+
+            if room_id not in self.rooms:
+                await self.send(text_data=protocol.dumps({
+                    "error": "not_subscribed",
+                    "room": room_id,
+                }))
+                return
+
+            await self.send_message(room_id, message)
+
+    async def subscribe(self, room_ids):
+        room_ids = self.room_list(room_ids)
+        new = [room_id for room_id in room_ids if room_id not in self.rooms]
+
+        if len(self.rooms) + len(new) > settings.CHAT_MUX_ROOMS_MAX:
+            await self.send(text_data=protocol.dumps({
+                "error": "too_many_rooms",
+                "rooms": new,
+                "max": settings.CHAT_MUX_ROOMS_MAX,
+            }))
+            return
+
+        if new and await ratelimit.acheck("ws:subscribe", user=self.user.id):
+            await self.send(text_data=protocol.dumps({
+                "error": "rate_limited",
+                "rooms": new,
+            }))
+            return
+
+        allowed = await self.allowed_rooms(new) if new else {}
+
+        for room_id in allowed:
+            await self.channel_layer.group_add(room_group(room_id), self.channel_name)
+            recent.watch(room_id)
+        self.rooms.update(allowed)
+
+        await self.send(text_data=protocol.dumps({
+            "type": "subscribed",
+            "rooms": [room_id for room_id in room_ids if room_id in self.rooms],
+            "denied": [room_id for room_id in room_ids if room_id not in self.rooms],
+        }))
+
+    async def unsubscribe(self, room_ids):
+        room_ids = [room_id for room_id in self.room_list(room_ids) if room_id in self.rooms]
+
+        for room_id in room_ids:
+            await self.channel_layer.group_discard(room_group(room_id), self.channel_name)
+            recent.unwatch(room_id)
+            del self.rooms[room_id]
+
+        await self.send(text_data=protocol.dumps({
+            "type": "unsubscribed",
+            "rooms": room_ids,
+        }))
+
+    def room_list(self, room_ids):
+        # unique, order kept; anything that is not a list of ids is ignored
+        if not isinstance(room_ids, list):
+            return []
+        return list(dict.fromkeys(r for r in room_ids if isinstance(r, str) and r))
@@ -6,13 +6,15 @@ from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 from rest_framework_simplejwt.tokens import UntypedToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from accounts.cache import users
 
 User = get_user_model()
 
 @database_sync_to_async
 def get_user(user_id):
+    # cached, with the profile loaded (consumers cannot lazy-load it)
     try:
-        return User.objects.get(id=user_id)
+        return users.get(user_id)
     except User.DoesNotExist:
         return None
 
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+FTS_TABLE = "chat_chatmessage_fts"
+
+PG_DOCUMENT = "to_tsvector('simple', coalesce(message, ''))"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "message, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, message) "
+            "SELECT id, message FROM chat_chatmessage "
+            "WHERE message IS NOT NULL AND message != ''"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX chatmessage_search_idx ON chat_chatmessage "
+            f"USING GIN ({PG_DOCUMENT})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS chatmessage_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,182 @@
+"""
+Recent messages of the rooms that are active in this process.
+
+Every ChatMessage is broadcast to the room's group, so a process with a
+chat socket in a room sees each new message of that room pass through.
+Those rooms keep their last CHAT_RECENT_MESSAGES history entries here,
+and the first page of chat history (``?limit=`` without ``before``) is
+answered from them instead of the database. At most CHAT_RECENT_ROOMS
+rooms are kept; the least recently used one goes first.
+
+A room is only kept while a socket in this process is subscribed to it
+(``watch``/``unwatch``): without one, its messages no longer pass through
+here and the buffer would go stale. A buffer starts with whatever
+messages arrive and is filled in by the first history read that misses.
+Editing or deleting a message drops its room's buffer here and, through
+the room's group, in every other process with a socket in the room.
+"""
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+
+
+class RoomBuffer:
+
+    def __init__(self):
+        # history entries (see api.views.chat.message_entry), oldest first
+        self.entries = []
+        self.ids = []
+        # True when ``entries`` holds every message of the room
+        self.complete = False
+
+    def add(self, entry, size):
+        i = bisect.bisect_left(self.ids, entry["id"])
+
+        if i < len(self.ids) and self.ids[i] == entry["id"]:
+            return
+
+        # broadcasts from different workers may arrive out of order
+        self.ids.insert(i, entry["id"])
+        self.entries.insert(i, entry)
+
+        if len(self.ids) > size:
+            del self.ids[0], self.entries[0]
+            self.complete = False
+
+
+class RecentMessages:
+
+    def __init__(self, rooms, size):
+        self.rooms = rooms
+        self.size = size
+        self.lock = threading.Lock()
+        # room unique_id -> RoomBuffer, least recently used first
+        self.buffers = OrderedDict()
+        # room unique_id -> sockets of this process in the room
+        self.watchers = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def watch(self, room_id):
+        with self.lock:
+            self.watchers[room_id] = self.watchers.get(room_id, 0) + 1
+
+    def unwatch(self, room_id):
+        with self.lock:
+            count = self.watchers.get(room_id, 0) - 1
+
+            if count > 0:
+                self.watchers[room_id] = count
+            else:
+                self.watchers.pop(room_id, None)
+                self.buffers.pop(room_id, None)
+
+    def buffer(self, room_id):
+        # the room's buffer, created if needed; call with the lock held
+        buffer = self.buffers.get(room_id)
+
+        if buffer is None:
+            buffer = self.buffers[room_id] = RoomBuffer()
+            if len(self.buffers) > self.rooms:
+                self.buffers.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.buffers.move_to_end(room_id)
+
+        return buffer
+
+    def add(self, room_id, entry):
+        """Remember a message broadcast to ``room_id``."""
+        if self.rooms <= 0:
+            return
+
+        with self.lock:
+            if room_id in self.watchers:
+                self.buffer(room_id).add(entry, self.size)
+
+    def fill(self, room_id, entries, complete):
+        """Add a page read from the database; ``complete`` if it is the whole room."""
+        if self.rooms <= 0:
+            return
+
+        with self.lock:
+            if room_id not in self.watchers:
+                return
+
+            buffer = self.buffer(room_id)
+            # nothing is trimmed, so the buffer then holds the whole room
+            fits = len(set(buffer.ids).union(e["id"] for e in entries)) <= self.size
+
+            for entry in entries:
+                buffer.add(entry, self.size)
+
+            if complete and fits:
+                buffer.complete = True
+
+    def page(self, room_id, limit):
+        """The newest ``limit`` entries, oldest first, or None if not all here."""
+        with self.lock:
+            buffer = self.buffers.get(room_id)
+
+            if buffer is None or limit > self.size or (
+                len(buffer.entries) < limit and not buffer.complete
+            ):
+                self.misses += 1
+                return None
+
+            self.buffers.move_to_end(room_id)
+            self.hits += 1
+            return buffer.entries[-limit:]
+
+    def discard(self, room_id):
+        with self.lock:
+            self.buffers.pop(room_id, None)
+
+    def discard_message(self, message_id):
+        # an edited or deleted message: drop the room it is buffered in
+        with self.lock:
+            for room_id, buffer in list(self.buffers.items()):
+                if message_id in buffer.ids:
+                    del self.buffers[room_id]
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "rooms_max": self.rooms,
+                "messages_per_room": self.size,
+                "rooms": len(self.buffers),
+                "rooms_watched": len(self.watchers),
+                "messages": sum(len(b.entries) for b in self.buffers.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0,
+                "evictions": self.evictions,
+            }
+
+
+def broadcast_entry(chat_message, user):
+    # the history entry as sent along with a group broadcast
+    return {
+        "id": chat_message.id,
+        "sender": {"id": user.id, "username": user.username},
+        "content": chat_message.message,
+        "timestamp": chat_message.timestamp.isoformat(),
+    }
+
+
+def received_entry(entry):
+    # back to what message_entry() gives for the database row
+    return {**entry, "timestamp": datetime.fromisoformat(entry["timestamp"])}
+
+
+recent = RecentMessages(
+    rooms=settings.CHAT_RECENT_ROOMS,
+    size=settings.CHAT_RECENT_MESSAGES,
+)
@@ -1,8 +1,9 @@
 # chat/routing.py
 
 from django.urls import re_path
-from .consumers import ChatConsumer
+from .consumers import ChatConsumer, MultiplexChatConsumer
 
 websocket_urlpatterns = [
+    re_path(r"ws/chat/$", MultiplexChatConsumer.as_asgi()),
     re_path(r"ws/chat/(?P<room_id>\w+)/$", ChatConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Full-text search over ChatMessage.message, same layout as donations.search:
+#   sqlite      FTS5 table, rowid = message id, kept in sync by signals
+#   postgresql  GIN index on the tsvector expression below (migration 0002)
+#   others      icontains fallback, newest first
+FTS_TABLE = "chat_chatmessage_fts"
+
+PG_DOCUMENT = "to_tsvector('simple', coalesce(message, ''))"
+
+
+def uses_fts5():
+    return connection.vendor == "sqlite"
+
+
+def index_messages(messages):
+    if not uses_fts5():
+        return
+
+    rows = [(m.id, m.message) for m in messages if m.message]
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, message) VALUES (%s, %s)",
+            rows
+        )
+
+
+def unindex_message(message_id):
+    if not uses_fts5():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [message_id]
+        )
+
+
+def search_messages(queryset, text):
+    """Messages in ``queryset`` matching every word of ``text``, best first."""
+    words = re.findall(r"\w+", text)
+
+    if not words:
+        return queryset.none()
+
+    if uses_fts5():
+        # every word as a quoted prefix term, so user input is never FTS syntax
+        match = " ".join(f'"{word}"*' for word in words)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            (match,)
+        )).annotate(rank=RawSQL(
+            # bm25: lower is better
+            f"SELECT rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = chat_chatmessage.id",
+            (match,)
+        )).order_by("rank", "-timestamp")
+
+    if connection.vendor == "postgresql":
+        query = " ".join(words)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT id FROM chat_chatmessage "
+            f"WHERE {PG_DOCUMENT} @@ plainto_tsquery('simple', %s)",
+            (query,)
+        )).annotate(rank=RawSQL(
+            # qualified: the outer query joins the room and sender tables
+            "ts_rank(to_tsvector('simple', coalesce(chat_chatmessage.message, '')), "
+            "plainto_tsquery('simple', %s))",
+            (query,)
+        )).order_by("-rank", "-timestamp")
+
+    for word in words:
+        queryset = queryset.filter(Q(message__icontains=word))
+    return queryset.order_by("-timestamp")
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from donations.feed import send
+from donations.models import AcceptedDonor
+from .consumers import room_group
+from .models import ChatMessage
+from .recent import recent
+from .search import index_messages, unindex_message
+
+
+def discard_recent(message):
+    # the buffer here now, and in every other process with a socket in
+    # the room through the room's group (ChatConsumer.chat_discard)
+    recent.discard_message(message.id)
+
+    room_id = (
+        AcceptedDonor.objects
+        .filter(id=message.room_id)
+        .values_list("unique_id", flat=True)
+        .first()
+    )
+    if room_id is None:
+        return
+
+    transaction.on_commit(
+        lambda: send(room_group(room_id), {"type": "chat.discard", "room": room_id})
+    )
+
+
+@receiver(post_save, sender=ChatMessage)
+def index_message(sender, instance, created, **kwargs):
+    index_messages([instance])
+
+    if not created:
+        discard_recent(instance)
+
+
+@receiver(post_delete, sender=ChatMessage)
+def remove_message_from_index(sender, instance, **kwargs):
+    unindex_message(instance.id)
+    discard_recent(instance)
@@ -1,6 +1,44 @@
 from django.contrib import admin
+from bloodconnect.admin import LargeTableAdmin
 from .models import *
 # Register your models here.
 
-admin.site.register(Request)
-admin.site.register(AcceptedDonor)
\ No newline at end of file
+
+@admin.register(Request)
+class RequestAdmin(LargeTableAdmin):
+    list_display = (
+        "short_id", "requester", "blood_group", "urgency",
+        "status", "pincode", "created_at",
+    )
+    list_select_related = ("requester",)
+    # status leads request_feed_idx; blood_group is its second column
+    list_filter = ("status", "blood_group")
+    # exact matches only, so the unique indexes are used
+    search_fields = ("=short_id", "=requester__username")
+    autocomplete_fields = ("requester",)
+    readonly_fields = ("short_id", "created_at", "updated_at")
+
+
+@admin.register(AcceptedDonor)
+class AcceptedDonorAdmin(LargeTableAdmin):
+    list_display = ("unique_id", "request", "donor", "status", "accepted_at")
+    # AcceptedDonor.__str__ and Request.__str__ walk these
+    list_select_related = ("request__requester", "donor")
+    list_filter = ("status",)
+    search_fields = ("=unique_id", "=request__short_id", "=donor__username")
+    raw_id_fields = ("request",)
+    autocomplete_fields = ("donor",)
+    readonly_fields = ("unique_id", "accepted_at", "finalized_at", "updated_at")
+
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = (
+        "recipient", "request", "channel", "urgent",
+        "status", "attempts", "next_attempt_at", "sent_at",
+    )
+    list_select_related = ("recipient", "request__requester")
+    list_filter = ("status", "channel")
+    search_fields = ("=recipient__username", "=request__short_id")
+    raw_id_fields = ("request",)
+    autocomplete_fields = ("recipient",)
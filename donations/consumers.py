@@ -0,0 +1,111 @@
+from channels.generic.websocket import AsyncWebsocketConsumer
+from bloodconnect import ratelimit
+from chat import protocol
+from api.serializers.request import RequestReadSerializer
+from api.views.request import BLOOD_COMPATIBILITY, feed_queryset
+from .feed import blood_group_channel, user_channel
+
+
+class FeedConsumer(AsyncWebsocketConsumer):
+    """
+    Live donor feed. Sends the same list as GET /api/requests/ once, then
+    only diffs:
+
+        {"type": "snapshot", "requests": [...]}
+        {"type": "diff", "changes": [
+            {"op": "insert" | "update", "request": {...}},
+            {"op": "remove", "short_id": "..."},
+        ]}
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        self.feed_groups = []
+
+        if self.user is None or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        if await ratelimit.acheck(
+            "ws:connect", user=self.user.id, ip=self.client_ip()
+        ):
+            await self.accept()
+            await self.close(code=4429)
+            return
+
+        profile = getattr(self.user, "profile", None)
+        donor_blood = getattr(profile, "blood_group", None)
+
+        self.feed_groups = [
+            blood_group_channel(blood_group)
+            for blood_group in BLOOD_COMPATIBILITY.get(donor_blood, [])
+        ]
+        self.feed_groups.append(user_channel(self.user.id))
+
+        # join before the snapshot query: changes committed meanwhile are
+        # queued and applied as (idempotent) diffs right after it
+        for group in self.feed_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+
+        await self.accept()
+
+        self.serializer = RequestReadSerializer(
+            feed_queryset(self.user, donor_blood),
+            many=True,
+            context={"user": self.user},
+        )
+        rows = await self.serializer.aget_rows()
+
+        # kept to render later diffs for this user
+        self.serializer.user_id = self.user.id
+        if self.serializer.accepted is None:
+            self.serializer.accepted = set()
+
+        self.visible = {row["id"] for row in rows}
+
+        await self.send(text_data=protocol.dumps({
+            "type": "snapshot",
+            "requests": self.serializer.build(rows),
+        }))
+
+    async def disconnect(self, close_code):
+        for group in self.feed_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def feed_changes(self, event):
+        changes = []
+
+        for change in event["changes"]:
+            if change["op"] == "remove":
+                if change["id"] in self.visible:
+                    self.visible.discard(change["id"])
+                    changes.append({"op": "remove", "short_id": change["short_id"]})
+                continue
+
+            row = change["row"]
+
+            # own requests are never in the feed
+            if row["requester_id"] == self.user.id:
+                continue
+
+            op = "update" if row["id"] in self.visible else "insert"
+            self.visible.add(row["id"])
+            changes.append({"op": op, "request": self.serializer.to_representation(row)})
+
+        await self.send_diff(changes)
+
+    async def feed_accepted(self, event):
+        row = event["row"]
+        self.serializer.accepted.add(row["id"])
+
+        if row["id"] in self.visible:
+            await self.send_diff(
+                [{"op": "update", "request": self.serializer.to_representation(row)}]
+            )
+
+    async def send_diff(self, changes):
+        if changes:
+            await self.send(text_data=protocol.dumps({"type": "diff", "changes": changes}))
+
+    def client_ip(self):
+        return ratelimit.scope_ip(self.scope)
@@ -0,0 +1,78 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import StatCounter
+
+# Key layout
+#   pending   "<blood_group>:<pincode prefix>"   pending requests
+#   requests  "<requester_id>:<status>"           requests per requester
+#   offers    "<donor_id>:<status>"               AcceptedDonor rows per donor
+PINCODE_PREFIX = 3
+
+
+def request_keys(requester_id, blood_group, pincode, status):
+    keys = [("requests", f"{requester_id}:{status}")]
+
+    if status == "Pending":
+        keys.append(("pending", f"{blood_group}:{pincode[:PINCODE_PREFIX]}"))
+
+    return keys
+
+
+def offer_keys(donor_id, status):
+    return [("offers", f"{donor_id}:{status}")]
+
+
+def apply(deltas):
+    """Add ``deltas`` ({(scope, key): delta}) to the counters table."""
+    for (scope, key), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+
+        counter = StatCounter.objects.filter(scope=scope, key=key)
+
+        if counter.update(value=F("value") + delta):
+            continue
+
+        try:
+            with transaction.atomic():
+                StatCounter.objects.create(scope=scope, key=key, value=delta)
+        except IntegrityError:
+            # created concurrently, fall back to the increment
+            counter.update(value=F("value") + delta)
+
+
+def track_requests(requests, old_status=None):
+    """Count new requests, or a status change when ``old_status`` is given."""
+    deltas = Counter()
+
+    for req in requests:
+        if old_status is not None:
+            for key in request_keys(
+                req.requester_id, req.blood_group, req.pincode, old_status
+            ):
+                deltas[key] -= 1
+
+        for key in request_keys(
+            req.requester_id, req.blood_group, req.pincode, req.status
+        ):
+            deltas[key] += 1
+
+    apply(deltas)
+
+
+def track_offers(changes):
+    """``changes`` is an iterable of (donor_id, old_status, new_status)."""
+    deltas = Counter()
+
+    for donor_id, old_status, new_status in changes:
+        if old_status is not None:
+            for key in offer_keys(donor_id, old_status):
+                deltas[key] -= 1
+
+        for key in offer_keys(donor_id, new_status):
+            deltas[key] += 1
+
+    apply(deltas)
@@ -0,0 +1,50 @@
+"""
+Append-only event log.
+
+Every create and status change in the donations and chat code paths
+appends Event rows inside the transaction that makes the change, so the
+log never disagrees with the tables. Kinds:
+
+    request.created         key=short_id   data: blood_group, pincode, urgency
+    request.status_changed  key=short_id   data: old_status, new_status
+    offer.created           key=unique_id  data: request
+    offer.status_changed    key=unique_id  data: request, old_status, new_status
+    message.sent            key=room unique_id   data: message_id
+
+Consumers read with ``tail()`` (or GET /api/events/) and keep the last
+id they processed as their cursor.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Event
+
+
+def event(kind, key, actor_id=None, **data):
+    return Event(kind=kind, key=key, actor_id=actor_id, data=data)
+
+
+def append(events):
+    """Write ``events`` with one INSERT per 500; call inside the change's transaction."""
+    Event.objects.bulk_create(events, batch_size=500)
+
+
+def tail(after=0, kinds=None, limit=500):
+    """
+    Events with id > ``after``, oldest first.
+
+    Ids are handed out at insert, not at commit, so a long transaction
+    can commit an id below one already read. Events younger than
+    EVENT_TAIL_SETTLE_SECONDS are held back to give such writers time
+    to commit.
+    """
+    settled = timezone.now() - timedelta(seconds=settings.EVENT_TAIL_SETTLE_SECONDS)
+
+    events = Event.objects.filter(id__gt=after, created_at__lte=settled)
+
+    if kinds:
+        events = events.filter(kind__in=kinds)
+
+    return events.order_by("id")[:limit]
@@ -0,0 +1,133 @@
+import csv
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Request, AcceptedDonor
+
+CHUNK_SIZE = 2000
+
+# dataset -> (queryset, date column, exported columns)
+DATASETS = {
+    "requests": (
+        lambda: Request.objects.all(),
+        "created_at",
+        [
+            "id", "short_id", "requester_id", "requester__username",
+            "patient_name", "patient_age", "blood_group", "urgency",
+            "location", "pincode", "reason", "status", "created_at",
+        ],
+    ),
+    "offers": (
+        lambda: AcceptedDonor.objects.all(),
+        "accepted_at",
+        [
+            "id", "unique_id", "request__short_id", "request__blood_group",
+            "donor_id", "donor__username", "status", "accepted_at",
+        ],
+    ),
+    "donations": (
+        lambda: AcceptedDonor.objects.filter(status="Finalized"),
+        "accepted_at",
+        [
+            "id", "unique_id", "request__short_id", "request__blood_group",
+            "request__requester__username", "donor_id", "donor__username",
+            "accepted_at",
+        ],
+    ),
+}
+
+FORMATS = ("csv", "ndjson")
+
+
+def day_start(value):
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"Invalid date: {value!r}, expected YYYY-MM-DD")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(dataset, status=None, since=None, until=None):
+    """
+    Return (columns, rows) for ``dataset``. ``since``/``until`` are inclusive
+    YYYY-MM-DD dates. Rows are tuples streamed with iterator(chunk_size).
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset!r}")
+
+    queryset, date_column, columns = DATASETS[dataset]
+    queryset = queryset()
+
+    if status:
+        queryset = queryset.filter(status=status)
+    if since:
+        queryset = queryset.filter(**{f"{date_column}__gte": day_start(since)})
+    if until:
+        # whole day, but still a plain range so the column index can be used
+        end = day_start(until) + timedelta(days=1)
+        queryset = queryset.filter(**{f"{date_column}__lt": end})
+
+    rows = (
+        queryset.order_by("id")
+        .values_list(*columns)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return columns, rows
+
+
+class Echo:
+    # csv.writer target that hands the formatted line straight back
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(
+            [v.isoformat() if isinstance(v, datetime) else v for v in row]
+        )
+
+
+def ndjson_lines(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def export_lines(output, columns, rows):
+    if output == "csv":
+        return csv_lines(columns, rows)
+    if output == "ndjson":
+        return ndjson_lines(columns, rows)
+    raise ValueError(f"Unknown format: {output!r}")
+
+
+def iter_lines(lines, batch=CHUNK_SIZE):
+    """The lines in chunks of ``batch``, for WSGI, which streams sync iterators."""
+    while True:
+        chunk = list(islice(lines, batch))
+        if not chunk:
+            break
+        yield "".join(chunk)
+
+
+async def aiter_lines(lines, batch=CHUNK_SIZE):
+    """
+    Serve a sync line generator from ASGI without materializing it: Django
+    would otherwise list() a sync iterator before streaming it. Batches are
+    pulled on the thread-sensitive executor so the DB cursor stays on one
+    connection.
+    """
+    next_batch = sync_to_async(lambda: list(islice(lines, batch)))
+
+    while True:
+        chunk = await next_batch()
+        if not chunk:
+            break
+        yield "".join(chunk)
@@ -0,0 +1,71 @@
+"""
+Change events for the live request feed (ws/feed/, donations.consumers).
+
+Each change is published once, after commit, to the group of the
+request's blood group. Subscribers join the groups their own blood group
+is shown in the HTTP feed and turn events into insert/update/remove diffs
+themselves, so nothing is queried or serialized per subscriber here.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from api.serializers.base import DATETIME
+from api.serializers.request import RequestReadSerializer
+
+
+def blood_group_channel(blood_group):
+    # group names allow letters, digits, "-", "_" and "." only
+    return "feed." + blood_group.replace("+", "_pos").replace("-", "_neg")
+
+
+def user_channel(user_id):
+    return f"feed.user.{user_id}"
+
+
+def request_row(obj):
+    # same keys as RequestReadSerializer rows; created_at is sent
+    # preformatted, DATETIME.to_representation passes strings through
+    row = {}
+    for column in RequestReadSerializer.columns:
+        value = obj
+        for attr in column.split("__"):
+            value = getattr(value, attr)
+        row[column] = value
+
+    row["created_at"] = DATETIME.to_representation(row["created_at"])
+    return row
+
+
+def send(group, message):
+    channel_layer = get_channel_layer()
+
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(group, message)
+
+
+def publish_requests(requests, deleted=False):
+    changes = {}
+
+    for obj in requests:
+        if obj.status == "Pending" and not deleted:
+            change = {"op": "upsert", "row": request_row(obj)}
+        else:
+            change = {"op": "remove", "id": obj.id, "short_id": obj.short_id}
+
+        changes.setdefault(blood_group_channel(obj.blood_group), []).append(change)
+
+    def fan_out():
+        for group, group_changes in changes.items():
+            send(group, {"type": "feed.changes", "changes": group_changes})
+
+    transaction.on_commit(fan_out)
+
+
+def publish_offer(offer):
+    # only the accepting donor's own can_accept flips
+    row = request_row(offer.request)
+
+    transaction.on_commit(
+        lambda: send(user_channel(offer.donor_id), {"type": "feed.accepted", "row": row})
+    )
@@ -0,0 +1,87 @@
+"""
+Time-sortable ids for Request.short_id and AcceptedDonor.unique_id.
+
+ULID layout: 48 bits of Unix time in milliseconds, then 80 random bits,
+written as 22 characters of shortuuid's base-57 alphabet (the same length
+and characters as the random ids used before). The alphabet is in ASCII
+order and the width is fixed, so ids sort by creation time as plain
+strings: new rows append to the unique index instead of landing on a
+random page. Rows from before these ids keep their random ones, so
+ordering by id is only meaningful among new rows.
+
+Within one millisecond a process increments the random part instead of
+drawing a new one, so the ids it hands out never go backwards.
+
+Sorting as plain strings needs a byte-by-byte collation, which
+TimeIdField gives the column.
+"""
+import secrets
+import threading
+from datetime import datetime, timezone
+
+from django.db import models
+
+ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+LENGTH = 22
+RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last = (0, 0)
+
+
+def encode(number):
+    chars = []
+    for _ in range(LENGTH):
+        number, digit = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def decode(value):
+    number = 0
+    for char in value:
+        number = number * len(ALPHABET) + ALPHABET.index(char)
+    return number
+
+
+def time_id(when=None):
+    """A new id for ``when`` (a datetime, default now)."""
+    global _last
+
+    if when is None:
+        when = datetime.now(timezone.utc)
+    millis = int(when.timestamp() * 1000)
+
+    with _lock:
+        last_millis, last_random = _last
+
+        if millis <= last_millis:
+            # same millisecond (or the clock stepped back): stay ordered
+            millis, random = last_millis, last_random + 1
+        else:
+            # top bit left clear, so increments never carry into the time
+            random = secrets.randbits(RANDOM_BITS - 1)
+
+        _last = (millis, random)
+
+    return encode(millis << RANDOM_BITS | random)
+
+
+def id_time(value):
+    """When the id ``value`` was made, to the millisecond."""
+    millis = decode(value) >> RANDOM_BITS
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+
+
+class TimeIdField(models.CharField):
+    """
+    CharField for time ids. On PostgreSQL the column gets the "C" collation
+    (the database default is usually a locale one that ignores case);
+    SQLite has no "C" collation and compares bytes already.
+    """
+
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == "postgresql" and not self.db_collation:
+            params["collation"] = "C"
+        return params
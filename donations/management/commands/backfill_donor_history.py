@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import Profile
+from donations.models import AcceptedDonor
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild Profile.donation_count and last_donated from finalized "
+        "AcceptedDonor rows, one batch of profiles per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report profiles that would change, do not write.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = 0
+        checked = 0
+        changed = 0
+
+        while True:
+            with transaction.atomic():
+                # row locks make a concurrent finalize wait for (or be seen
+                # by) this batch, so its F() increment is never lost
+                profiles = list(
+                    Profile.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .only("id", "user_id", "donation_count", "last_donated")
+                    [:batch_size]
+                )
+                if not profiles:
+                    break
+
+                to_update = self.rebuild(profiles)
+
+                if not options["dry_run"]:
+                    Profile.objects.bulk_update(
+                        to_update, ["donation_count", "last_donated", "updated_at"]
+                    )
+
+            last_pk = profiles[-1].pk
+            checked += len(profiles)
+            changed += len(to_update)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{changed} of {checked} profiles would change (dry run)")
+        else:
+            self.stdout.write(f"{changed} of {checked} profiles updated")
+
+    def rebuild(self, profiles):
+        history = {
+            row["donor_id"]: row
+            for row in AcceptedDonor.objects.filter(
+                status="Finalized",
+                donor_id__in=[p.user_id for p in profiles],
+            )
+            .values("donor_id")
+            # rows finalized before finalized_at existed use accepted_at
+            .annotate(n=Count("id"), last=Max(Coalesce("finalized_at", "accepted_at")))
+            .order_by()
+        }
+
+        to_update = []
+
+        for profile in profiles:
+            row = history.get(profile.user_id)
+            count = row["n"] if row else 0
+            last = timezone.localdate(row["last"]) if row else None
+
+            # last_donated only moves forward: a later date the donor
+            # entered themselves is kept
+            if profile.last_donated and (last is None or profile.last_donated > last):
+                last = profile.last_donated
+
+            if (count, last) != (profile.donation_count, profile.last_donated):
+                profile.donation_count = count
+                profile.last_donated = last
+                # bulk_update() does not touch auto_now fields
+                profile.updated_at = timezone.now()
+                to_update.append(profile)
+
+        return to_update
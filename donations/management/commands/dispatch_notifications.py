@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from donations.notifications import dispatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Send email/SMS alerts for new requests to their recommended donors: "
+        "Emergency requests at once, others as periodic digests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, dispatching every INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created, sent, failed = dispatch()
+            self.stdout.write(
+                f"{created} notifications queued, {sent} messages sent, {failed} failed"
+            )
+
+            if options["interval"] <= 0:
+                break
+
+            time.sleep(options["interval"])
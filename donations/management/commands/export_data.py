@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.export import DATASETS, FORMATS, export_rows, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream requests, offers or finalized donations as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--format", dest="output", choices=FORMATS, default="csv")
+        parser.add_argument("--status")
+        parser.add_argument("--since", help="YYYY-MM-DD, inclusive")
+        parser.add_argument("--until", help="YYYY-MM-DD, inclusive")
+        parser.add_argument("--file", help="Write to this path instead of stdout")
+
+    def handle(self, *args, **options):
+        try:
+            columns, rows = export_rows(
+                options["dataset"],
+                status=options["status"],
+                since=options["since"],
+                until=options["until"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        lines = export_lines(options["output"], columns, rows)
+
+        if options["file"]:
+            with open(options["file"], "w", newline="", encoding="utf-8") as f:
+                f.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
@@ -0,0 +1,94 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Substr
+
+from donations.counters import PINCODE_PREFIX
+from donations.models import Request, AcceptedDonor, StatCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute StatCounter rows from Request/AcceptedDonor and fix any "
+        "drift. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift, do not write.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # lock first: a write that bumps a counter now waits for us, so
+            # it is either in the counts below or applied after them
+            current = {
+                (c.scope, c.key): c
+                for c in StatCounter.objects.select_for_update()
+            }
+
+            expected = self.expected_counts()
+
+            to_update = []
+            to_create = []
+
+            for key, value in expected.items():
+                counter = current.pop(key, None)
+
+                if counter is None:
+                    to_create.append(
+                        StatCounter(scope=key[0], key=key[1], value=value)
+                    )
+                elif counter.value != value:
+                    counter.value = value
+                    to_update.append(counter)
+
+            # counters with no matching rows left
+            stale = [c.id for c in current.values() if c.value != 0]
+
+            drift = len(to_update) + len(to_create) + len(stale)
+
+            if not options["dry_run"]:
+                StatCounter.objects.bulk_update(to_update, ["value"], batch_size=500)
+                StatCounter.objects.bulk_create(to_create, batch_size=500)
+                StatCounter.objects.filter(id__in=stale).update(value=0)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{drift} counters drifted (dry run)")
+        else:
+            self.stdout.write(f"{drift} counters drifted and were fixed")
+
+    def expected_counts(self):
+        counts = Counter()
+
+        pending = (
+            Request.objects.filter(status="Pending")
+            .annotate(prefix=Substr("pincode", 1, PINCODE_PREFIX))
+            .values("blood_group", "prefix")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for row in pending:
+            counts[("pending", f"{row['blood_group']}:{row['prefix']}")] = row["n"]
+
+        requests = (
+            Request.objects.values("requester_id", "status")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for row in requests:
+            counts[("requests", f"{row['requester_id']}:{row['status']}")] = row["n"]
+
+        offers = (
+            AcceptedDonor.objects.values("donor_id", "status")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for row in offers:
+            counts[("offers", f"{row['donor_id']}:{row['status']}")] = row["n"]
+
+        return counts
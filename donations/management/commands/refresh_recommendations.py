@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from donations.recommendations import refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the precomputed donor recommendations of open requests from "
+        "the event log and recently edited profiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Rescore every open request instead of only what changed.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, refreshing every INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        rebuild = options["rebuild"]
+
+        while True:
+            scored, donors = refresh(rebuild=rebuild)
+            self.stdout.write(f"{scored} requests scored, {donors} donors rescored")
+
+            if options["interval"] <= 0:
+                break
+
+            rebuild = False
+            time.sleep(options["interval"])
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:18
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Substr
+
+# donations.counters.PINCODE_PREFIX as of this migration
+PINCODE_PREFIX = 3
+
+
+def seed_counters(apps, schema_editor):
+    # the counters only get deltas from here on, so start them from the
+    # existing rows (what reconcile_counters computes)
+    Request = apps.get_model("donations", "Request")
+    AcceptedDonor = apps.get_model("donations", "AcceptedDonor")
+    StatCounter = apps.get_model("donations", "StatCounter")
+
+    counts = Counter()
+
+    pending = (
+        Request.objects.filter(status="Pending")
+        .annotate(prefix=Substr("pincode", 1, PINCODE_PREFIX))
+        .values("blood_group", "prefix")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in pending:
+        counts[("pending", f"{row['blood_group']}:{row['prefix']}")] = row["n"]
+
+    requests = (
+        Request.objects.values("requester_id", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in requests:
+        counts[("requests", f"{row['requester_id']}:{row['status']}")] = row["n"]
+
+    offers = (
+        AcceptedDonor.objects.values("donor_id", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in offers:
+        counts[("offers", f"{row['donor_id']}:{row['status']}")] = row["n"]
+
+    StatCounter.objects.bulk_create(
+        [
+            StatCounter(scope=scope, key=key, value=value)
+            for (scope, key), value in counts.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0007_alter_accepteddonor_unique_id_alter_request_short_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.CharField(max_length=20)),
+                ("key", models.CharField(max_length=64)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scope", "key"), name="unique_stat_counter"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
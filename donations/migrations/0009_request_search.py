@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+FTS_TABLE = "donations_request_fts"
+
+PG_DOCUMENT = (
+    "to_tsvector('simple', "
+    "coalesce(patient_name, '') || ' ' || "
+    "coalesce(location, '') || ' ' || "
+    "coalesce(reason, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "patient_name, location, reason, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, patient_name, location, reason) "
+            "SELECT id, patient_name, location, coalesce(reason, '') "
+            "FROM donations_request"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX request_search_idx ON donations_request "
+            f"USING GIN ({PG_DOCUMENT})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS request_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0008_statcounter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="request",
+            index=models.Index(
+                fields=["status", "blood_group", "-created_at"], name="request_feed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="request",
+            index=models.Index(
+                fields=["pincode"],
+                name="request_pincode_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0009_request_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accepteddonor",
+            name="finalized_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
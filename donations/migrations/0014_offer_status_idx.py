@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0013_recommendation_checkpoint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="accepteddonor",
+            index=models.Index(fields=["status", "-id"], name="offer_status_idx"),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:01
+
+import donations.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # existing ids are kept as they are (links, chat room URLs and the
+    # event log refer to them); only new rows get time ids
+
+    dependencies = [
+        ("donations", "0014_offer_status_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="request",
+            name="request_feed_idx",
+        ),
+        migrations.AlterField(
+            model_name="accepteddonor",
+            name="unique_id",
+            field=donations.ids.TimeIdField(
+                default=donations.ids.time_id,
+                editable=False,
+                max_length=22,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="request",
+            name="short_id",
+            field=donations.ids.TimeIdField(
+                default=donations.ids.time_id,
+                editable=False,
+                max_length=22,
+                unique=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="request",
+            index=models.Index(
+                fields=["status", "blood_group", "-created_at", "-id"],
+                name="request_feed_idx",
+            ),
+        ),
+    ]
@@ -1,11 +1,8 @@
 # Create your models here.
-import shortuuid
 from django.db import models
 from django.contrib.auth.models import User
 
-import shortuuid
-from django.db import models
-from django.contrib.auth.models import User
+from .ids import time_id, TimeIdField
 
 class Request(models.Model):
     
@@ -26,10 +23,10 @@ class Request(models.Model):
         ("Not Urgent", "Not Urgent"),
     ]
 
-    short_id = models.CharField(
+    short_id = TimeIdField(
         max_length=22,
         unique=True,
-        default=shortuuid.uuid,
+        default=time_id,
         editable=False
     )
 
@@ -56,12 +53,29 @@ class Request(models.Model):
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # ?since= delta sync; bump it by hand in .update() calls
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # donor feed: pending + compatible groups, newest first;
+            # id breaks ties and makes (created_at, id) a keyset cursor
+            models.Index(
+                fields=["status", "blood_group", "-created_at", "-id"],
+                name="request_feed_idx"
+            ),
+            # pincode prefix filter (LIKE 'xxx%' on PostgreSQL)
+            models.Index(
+                fields=["pincode"],
+                name="request_pincode_idx",
+                opclasses=["varchar_pattern_ops"]
+            ),
+        ]
 
     def __str__(self):
         return f"{self.requester.username} -> {self.short_id} | {self.blood_group}"
 
 
-import shortuuid
 from django.db import models
 from django.contrib.auth.models import User
 from .models import Request  # same app
@@ -74,10 +88,10 @@ class AcceptedDonor(models.Model):
         ("Rejected", "Rejected"),
     ]
 
-    unique_id = models.CharField(
+    unique_id = TimeIdField(
         max_length=22,
         unique=True,
-        default=shortuuid.uuid,
+        default=time_id,
         editable=False
     )
 
@@ -100,7 +114,161 @@ class AcceptedDonor(models.Model):
     )
 
     accepted_at = models.DateTimeField(auto_now_add=True)
+    finalized_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # admin status filter, newest first
+            models.Index(fields=["status", "-id"], name="offer_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.request.requester.username}, {self.donor.username} → {self.request.short_id}"
 
+
+class StatCounter(models.Model):
+    # pre-aggregated counts, see donations/counters.py for the key layout
+    scope = models.CharField(max_length=20)
+    key = models.CharField(max_length=64)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"],
+                name="unique_stat_counter"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} = {self.value}"
+
+
+class Tombstone(models.Model):
+    # deleted requests/offers, so ?since= syncs can report them as removed
+    KIND_CHOICES = [
+        ("request", "request"),
+        ("offer", "offer"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=22)
+    # requester of the (offer's) request
+    owner_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "deleted_at"], name="tombstone_since_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} deleted {self.deleted_at}"
+
+
+class Event(models.Model):
+    # append-only log of creates and status changes, see donations/events.py
+    kind = models.CharField(max_length=40)
+    # short_id / unique_id of the request, offer or chat room
+    key = models.CharField(max_length=22)
+    actor_id = models.IntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "id"], name="event_kind_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.key}"
+
+
+class Recommendation(models.Model):
+    # top donors per open request, see donations/recommendations.py
+    request = models.ForeignKey(
+        Request,
+        related_name="recommendations",
+        on_delete=models.CASCADE
+    )
+    donor = models.ForeignKey(
+        User,
+        related_name="recommendations",
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField()
+    # donors in cooldown are not recommended until this date
+    eligible_from = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["request", "donor"],
+                name="unique_recommendation"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["request", "-score"], name="recommendation_top_idx"),
+        ]
+
+
+class Checkpoint(models.Model):
+    # progress of a background job through the event log
+    name = models.CharField(max_length=50, unique=True)
+    event_id = models.BigIntegerField(default=0)
+    ran_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.event_id}"
+
+
+class Notification(models.Model):
+    # out-of-band donor alert, see donations/notifications.py
+    CHANNEL_CHOICES = [
+        ("email", "email"),
+        ("sms", "sms"),
+    ]
+    STATUS_CHOICES = [
+        ("Pending", "Pending"),
+        ("Sent", "Sent"),
+        ("Failed", "Failed"),
+        ("Dropped", "Dropped"),
+    ]
+
+    recipient = models.ForeignKey(
+        User,
+        related_name="notifications",
+        on_delete=models.CASCADE
+    )
+    request = models.ForeignKey(
+        Request,
+        related_name="notifications",
+        on_delete=models.CASCADE
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    # Emergency requests go out at once, others in the next digest
+    urgent = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="Pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    # claimed by a dispatcher until then, see notifications.claim
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # one alert per donor, request and channel
+            models.UniqueConstraint(
+                fields=["recipient", "request", "channel"],
+                name="unique_notification"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="notification_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} {self.recipient_id} -> {self.request_id} ({self.status})"
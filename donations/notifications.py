@@ -0,0 +1,336 @@
+"""
+Out-of-band donor alerts by email and SMS, sent in the background.
+
+The event log is the outbox: perform_create (and the bulk endpoint)
+append ``request.created`` in the request's own transaction, so an alert
+is never sent for a request that rolled back and never lost for one that
+committed, and the API call does not wait for a mail server. ``dispatch()``
+follows the log from the Checkpoint "notifications" and
+
+1. expands each new open request into Notification rows for its best
+   NOTIFICATION_RECIPIENTS recommended donors, one per donor and channel
+   (a unique constraint, so reading an event twice is harmless);
+2. sends the rows that are due, one message per donor and channel, to the
+   channel's provider in batches of NOTIFICATION_BATCH.
+
+Emergency requests are due at once. Others wait NOTIFICATION_DIGEST_MINUTES
+and a donor's pending ones go out together as one summary, as do several
+alerts for the same donor in one batch. A failed message is retried with
+exponential backoff from NOTIFICATION_RETRY_SECONDS, and given up after
+NOTIFICATION_MAX_ATTEMPTS. Alerts for requests that were closed in the
+meantime are dropped.
+
+Providers are set per channel in NOTIFICATION_PROVIDERS as dotted paths to
+a class taking the channel name, with ``send(messages)`` returning one
+error string (or None) per message. EmailProvider goes through Django's
+EMAIL_BACKEND, so a local SMTP server or the file/locmem backends stand
+in for the real one; FileProvider appends JSON lines to a file, for SMS
+until a gateway is plugged in.
+"""
+import json
+import os
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .events import tail
+from .models import Request, Recommendation, Checkpoint, Notification
+from .recommendations import score_request
+
+Message = namedtuple("Message", "to subject body")
+
+# claimed rows are left alone by other dispatchers for this long
+LEASE_SECONDS = 300
+
+
+# ---------------- PROVIDERS ----------------
+
+class EmailProvider:
+    """Django's EMAIL_BACKEND, one connection per batch."""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def send(self, messages):
+        connection = get_connection()
+        connection.open()
+        errors = []
+
+        try:
+            for message in messages:
+                email = EmailMessage(
+                    message.subject,
+                    message.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [message.to],
+                    connection=connection,
+                )
+                try:
+                    email.send()
+                    errors.append(None)
+                except Exception as exc:
+                    errors.append(str(exc) or exc.__class__.__name__)
+        finally:
+            connection.close()
+
+        return errors
+
+
+class FileProvider:
+    """Appends messages to NOTIFICATION_FILE_DIR/<channel>.jsonl."""
+
+    def __init__(self, channel):
+        self.path = os.path.join(settings.NOTIFICATION_FILE_DIR, f"{channel}.jsonl")
+
+    def send(self, messages):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with open(self.path, "a") as f:
+            for message in messages:
+                f.write(json.dumps(message._asdict()) + "\n")
+
+        return [None] * len(messages)
+
+
+def providers():
+    return {
+        channel: import_string(path)(channel)
+        for channel, path in settings.NOTIFICATION_PROVIDERS.items()
+    }
+
+
+# ---------------- EXPAND ----------------
+
+def addresses(user):
+    # channel -> where to reach ``user``, for the channels it has
+    found = {}
+
+    if user.email:
+        found["email"] = user.email
+    profile = getattr(user, "profile", None)
+    if profile is not None and profile.phone:
+        found["sms"] = profile.phone
+
+    return found
+
+
+def notifications_for(req, now):
+    recs = (
+        Recommendation.objects
+        .filter(request=req)
+        .filter(Q(eligible_from__isnull=True) | Q(eligible_from__lte=now.date()))
+        .select_related("donor__profile")
+        .order_by("-score")[:settings.NOTIFICATION_RECIPIENTS]
+    )
+
+    urgent = req.urgency == "Emergency"
+    due = now if urgent else now + timedelta(minutes=settings.NOTIFICATION_DIGEST_MINUTES)
+
+    return [
+        Notification(
+            recipient_id=rec.donor_id,
+            request_id=req.id,
+            channel=channel,
+            urgent=urgent,
+            next_attempt_at=due,
+        )
+        for rec in recs
+        for channel in addresses(rec.donor)
+        if channel in settings.NOTIFICATION_PROVIDERS
+    ]
+
+
+def expand(checkpoint, now):
+    """Notification rows for requests created since ``checkpoint``; returns how many."""
+    created = 0
+    last = checkpoint.event_id
+
+    while True:
+        events = list(
+            tail(after=last, kinds=["request.created"], limit=1000)
+            .values_list("id", "key")
+        )
+        if not events:
+            break
+
+        requests = Request.objects.filter(
+            short_id__in=[key for _, key in events], status="Pending"
+        ).only("id", "requester_id", "blood_group", "pincode", "urgency")
+
+        rows = []
+        for req in requests:
+            if not Recommendation.objects.filter(request=req).exists():
+                # the recommendations job has not seen it yet
+                score_request(req)
+            rows += notifications_for(req, now)
+
+        Notification.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        created += len(rows)
+
+        last = events[-1][0]
+        checkpoint.event_id = last
+        checkpoint.save(update_fields=["event_id"])
+
+    return created
+
+
+# ---------------- SEND ----------------
+
+def claim(now):
+    """Take the next batch of due rows, plus pending digest rows of the same donors."""
+    # rows another dispatcher is sending are skipped, by lock or by lease
+    free = Q(leased_until__isnull=True) | Q(leased_until__lte=now)
+
+    with transaction.atomic():
+        due = list(
+            Notification.objects
+            .select_for_update(skip_locked=True)
+            .filter(free, status="Pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .values_list("id", "recipient_id", "channel")[:settings.NOTIFICATION_BATCH]
+        )
+        if not due:
+            return []
+
+        ids = {row[0] for row in due}
+        pairs = {(recipient_id, channel) for _, recipient_id, channel in due}
+
+        # a donor's waiting digest goes out with whatever is sent to them now,
+        # but not rows waiting out a retry backoff
+        waiting = Q()
+        for recipient_id, channel in pairs:
+            waiting |= Q(recipient_id=recipient_id, channel=channel)
+        ids |= set(
+            Notification.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                waiting, free,
+                status="Pending", urgent=False, attempts=0, next_attempt_at__gt=now,
+            )
+            .values_list("id", flat=True)
+        )
+
+        Notification.objects.filter(id__in=ids).update(
+            leased_until=now + timedelta(seconds=LEASE_SECONDS)
+        )
+
+    return list(
+        Notification.objects
+        .filter(id__in=ids)
+        .select_related("recipient__profile", "request")
+        .order_by("id")
+    )
+
+
+def compose(req_list):
+    # Emergency requests first
+    req_list = sorted(req_list, key=lambda req: req.urgency != "Emergency")
+    prefix = "Urgent: " if req_list[0].urgency == "Emergency" else ""
+
+    if len(req_list) == 1:
+        req = req_list[0]
+        subject = f"{prefix}{req.blood_group} blood needed near {req.pincode}"
+    else:
+        subject = f"{prefix}{len(req_list)} requests for blood you can give"
+
+    lines = [
+        f"{req.blood_group} ({req.urgency}) at {req.location}, {req.pincode}: "
+        f"request {req.short_id}"
+        for req in req_list
+    ]
+    return subject, "\n".join(lines)
+
+
+def backoff(attempts):
+    return timedelta(seconds=settings.NOTIFICATION_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def send_batch(rows, senders, now):
+    """Send ``rows``; returns (messages sent, messages failed)."""
+    groups = {}
+    for row in rows:
+        row.leased_until = None
+        groups.setdefault((row.recipient_id, row.channel), []).append(row)
+
+    outgoing = {}
+    for (_, channel), group in groups.items():
+        open_rows = [row for row in group if row.request.status == "Pending"]
+        for row in group:
+            if row.request.status != "Pending":
+                row.status = "Dropped"
+
+        to = addresses(group[0].recipient).get(channel)
+        if not open_rows or channel not in senders or not to:
+            for row in open_rows:
+                row.status = "Dropped"
+            continue
+
+        subject, body = compose([row.request for row in open_rows])
+        outgoing.setdefault(channel, []).append(
+            (Message(to, subject, body), open_rows)
+        )
+
+    sent = failed = 0
+    for channel, items in outgoing.items():
+        try:
+            errors = senders[channel].send([message for message, _ in items])
+        except Exception as exc:
+            errors = [str(exc) or exc.__class__.__name__] * len(items)
+
+        for (_, group), error in zip(items, errors):
+            attempts = max(row.attempts for row in group) + 1
+
+            for row in group:
+                row.attempts = attempts
+                if error is None:
+                    row.status = "Sent"
+                    row.sent_at = now
+                    row.last_error = ""
+                else:
+                    row.last_error = error
+                    if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                        row.status = "Failed"
+                    else:
+                        row.next_attempt_at = now + backoff(attempts)
+
+            if error is None:
+                sent += 1
+            else:
+                failed += 1
+
+    Notification.objects.bulk_update(
+        rows,
+        ["status", "attempts", "next_attempt_at", "leased_until", "last_error", "sent_at"],
+        batch_size=500,
+    )
+    return sent, failed
+
+
+def dispatch():
+    """One pass; returns (notifications created, messages sent, messages failed)."""
+    now = timezone.now()
+    checkpoint, _ = Checkpoint.objects.get_or_create(name="notifications")
+
+    created = expand(checkpoint, now)
+
+    senders = providers()
+    sent = failed = 0
+
+    while True:
+        rows = claim(now)
+        if not rows:
+            break
+        batch_sent, batch_failed = send_batch(rows, senders, now)
+        sent += batch_sent
+        failed += batch_failed
+
+    checkpoint.ran_at = now
+    checkpoint.save(update_fields=["ran_at"])
+
+    return created, sent, failed
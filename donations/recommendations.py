@@ -0,0 +1,266 @@
+"""
+Precomputed donor recommendations for open requests.
+
+    score = 0.5 * nearness + 0.3 * reliability + 0.2 * match
+
+    nearness     leading pincode digits shared with the request / 6
+                 (Indian pincodes narrow down from zone to post office)
+    reliability  (finalized + 1) / (offers + 2) from the offer counters,
+                 so donors without history start at 0.5
+    match        1 for the same blood group, 0.5 for another compatible one
+
+Only the best RECOMMENDATION_KEEP donors of each open request are stored.
+Donors in their cooldown (DONATION_COOLDOWN_DAYS after last_donated) are
+stored with ``eligible_from`` and simply reappear once it has passed.
+
+``refresh()`` works incrementally: it follows the event log for new and
+closed requests and for donors whose offer history changed, and picks up
+profiles edited since its previous run. See the refresh_recommendations
+command.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from accounts.models import Profile
+from .counters import offer_keys
+from .events import tail
+from .models import Request, AcceptedDonor, StatCounter, Recommendation, Checkpoint
+from .utils import COMPATIBILITY
+
+WEIGHTS = {"nearness": 0.5, "reliability": 0.3, "match": 0.2}
+
+PROFILE_COLUMNS = ("user_id", "blood_group", "pincode", "last_donated")
+
+EVENT_KINDS = [
+    "request.created",
+    "request.status_changed",
+    "offer.created",
+    "offer.status_changed",
+]
+
+
+def donor_groups(blood_group):
+    # groups that can give to ``blood_group``
+    return [donor for donor, recipients in COMPATIBILITY.items() if blood_group in recipients]
+
+
+def nearness(a, b):
+    shared = 0
+
+    for x, y in zip(a or "", b or ""):
+        if x != y:
+            break
+        shared += 1
+
+    return shared / 6
+
+
+def reliabilities(donor_ids):
+    statuses = [status for status, _ in AcceptedDonor.STATUS_CHOICES]
+    keys = [
+        key
+        for donor_id in donor_ids
+        for status in statuses
+        for _, key in offer_keys(donor_id, status)
+    ]
+
+    offers = {}
+    finalized = {}
+
+    for key, value in StatCounter.objects.filter(
+        scope="offers", key__in=keys
+    ).values_list("key", "value"):
+        donor_id, status = key.split(":")
+        donor_id = int(donor_id)
+        offers[donor_id] = offers.get(donor_id, 0) + value
+        if status == "Finalized":
+            finalized[donor_id] = value
+
+    return {
+        donor_id: (finalized.get(donor_id, 0) + 1) / (offers.get(donor_id, 0) + 2)
+        for donor_id in donor_ids
+    }
+
+
+def eligible_from(last_donated):
+    if last_donated is None:
+        return None
+    return last_donated + timedelta(days=settings.DONATION_COOLDOWN_DAYS)
+
+
+def score(req, profile, reliability):
+    match = 1.0 if profile["blood_group"] == req.blood_group else 0.5
+
+    return (
+        WEIGHTS["nearness"] * nearness(profile["pincode"], req.pincode)
+        + WEIGHTS["reliability"] * reliability
+        + WEIGHTS["match"] * match
+    )
+
+
+def recommendation(req, profile, reliability):
+    return Recommendation(
+        request_id=req.id,
+        donor_id=profile["user_id"],
+        score=score(req, profile, reliability),
+        eligible_from=eligible_from(profile["last_donated"]),
+    )
+
+
+def score_request(req):
+    """Replace the stored recommendations of ``req`` with its current top donors."""
+    keep = settings.RECOMMENDATION_KEEP
+    candidates = (
+        Profile.objects
+        .filter(blood_group__in=donor_groups(req.blood_group))
+        .exclude(user_id=req.requester_id)
+        .values(*PROFILE_COLUMNS)
+        .iterator(chunk_size=2000)
+    )
+
+    top = []
+    chunk = []
+
+    def consume(chunk):
+        reliability = reliabilities([p["user_id"] for p in chunk])
+        for profile in chunk:
+            rec = recommendation(req, profile, reliability[profile["user_id"]])
+            item = (rec.score, rec.donor_id, rec)
+            if len(top) < keep:
+                heapq.heappush(top, item)
+            elif item > top[0]:
+                heapq.heapreplace(top, item)
+
+    for profile in candidates:
+        chunk.append(profile)
+        if len(chunk) == 2000:
+            consume(chunk)
+            chunk = []
+    if chunk:
+        consume(chunk)
+
+    with transaction.atomic():
+        Recommendation.objects.filter(request_id=req.id).delete()
+        Recommendation.objects.bulk_create([rec for _, _, rec in top], batch_size=500)
+
+
+def rescore_donors(donor_ids):
+    """Recompute the pairs of ``donor_ids`` against every open request."""
+    keep = settings.RECOMMENDATION_KEEP
+    profiles = list(Profile.objects.filter(user_id__in=donor_ids).values(*PROFILE_COLUMNS))
+    reliability = reliabilities([p["user_id"] for p in profiles])
+
+    with transaction.atomic():
+        Recommendation.objects.filter(donor_id__in=donor_ids).delete()
+
+        # open requests each donor can give to, grouped by blood group
+        groups = {p["blood_group"] for p in profiles if p["blood_group"]}
+        recipients = {g for group in groups for g in COMPATIBILITY.get(group, [])}
+        requests = list(
+            Request.objects.filter(status="Pending", blood_group__in=recipients)
+            .only("id", "requester_id", "blood_group", "pincode")
+        )
+
+        # stored rows per request; once full, a new pair must beat the lowest
+        stored = {
+            row["request_id"]: (row["n"], row["low"])
+            for row in Recommendation.objects.filter(
+                request_id__in=[r.id for r in requests]
+            ).values("request_id").annotate(n=Count("id"), low=Min("score")).order_by()
+        }
+
+        created = []
+        for req in requests:
+            n, low = stored.get(req.id, (0, None))
+
+            for profile in profiles:
+                if (
+                    profile["user_id"] == req.requester_id
+                    or req.blood_group not in COMPATIBILITY.get(profile["blood_group"], [])
+                ):
+                    continue
+
+                rec = recommendation(req, profile, reliability[profile["user_id"]])
+                if n < keep or rec.score > low:
+                    created.append(rec)
+                    n += 1
+
+            if n > keep:
+                stored[req.id] = (n, low)
+            else:
+                stored.pop(req.id, None)
+
+        Recommendation.objects.bulk_create(created, batch_size=500)
+
+        for request_id in stored:
+            trim(request_id, keep)
+
+
+def trim(request_id, keep):
+    extra = (
+        Recommendation.objects.filter(request_id=request_id)
+        .order_by("-score", "-donor_id")
+        .values_list("id", flat=True)[keep:]
+    )
+    Recommendation.objects.filter(id__in=list(extra)).delete()
+
+
+def refresh(rebuild=False):
+    """One incremental pass; returns (requests scored, donors rescored)."""
+    checkpoint, _ = Checkpoint.objects.get_or_create(name="recommendations")
+    started = timezone.now()
+
+    new, closed, donors = set(), set(), set()
+    last = checkpoint.event_id
+
+    while True:
+        events = list(
+            tail(after=last, kinds=EVENT_KINDS, limit=1000)
+            .values_list("id", "kind", "key", "actor_id", "data")
+        )
+        if not events:
+            break
+
+        for _, kind, key, actor_id, data in events:
+            if kind == "request.created":
+                new.add(key)
+            elif kind == "request.status_changed" and data["new_status"] != "Pending":
+                closed.add(key)
+            elif kind == "offer.created":
+                donors.add(actor_id)
+            elif kind == "offer.status_changed":
+                donors.add(data["donor"])
+
+        last = events[-1][0]
+
+    Recommendation.objects.filter(request__short_id__in=closed).delete()
+
+    if rebuild or checkpoint.ran_at is None:
+        to_score = Request.objects.filter(status="Pending")
+        donors = set()
+    else:
+        to_score = Request.objects.filter(short_id__in=new - closed, status="Pending")
+        donors |= set(
+            Profile.objects.filter(updated_at__gte=checkpoint.ran_at)
+            .values_list("user_id", flat=True)
+        )
+
+    scored = 0
+    for req in to_score.only("id", "requester_id", "blood_group", "pincode").iterator():
+        score_request(req)
+        scored += 1
+
+    donors = sorted(donors)
+    for i in range(0, len(donors), 500):
+        rescore_donors(donors[i:i + 500])
+
+    checkpoint.event_id = last
+    checkpoint.ran_at = started
+    checkpoint.save(update_fields=["event_id", "ran_at"])
+
+    return scored, len(donors)
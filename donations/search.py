@@ -0,0 +1,83 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Free-text search over Request.patient_name / location / reason.
+#   sqlite      FTS5 table, rowid = request id, kept in sync by signals
+#   postgresql  GIN index on the tsvector expression below (migration 0009)
+#   others      icontains fallback
+FTS_TABLE = "donations_request_fts"
+
+PG_DOCUMENT = (
+    "to_tsvector('simple', "
+    "coalesce(patient_name, '') || ' ' || "
+    "coalesce(location, '') || ' ' || "
+    "coalesce(reason, ''))"
+)
+
+
+def uses_fts5():
+    return connection.vendor == "sqlite"
+
+
+def index_requests(requests):
+    if not uses_fts5():
+        return
+
+    rows = [
+        (r.id, r.patient_name, r.location, r.reason or "")
+        for r in requests
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, patient_name, location, reason) "
+            "VALUES (%s, %s, %s, %s)",
+            rows
+        )
+
+
+def unindex_request(request_id):
+    if not uses_fts5():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [request_id]
+        )
+
+
+def search_requests(queryset, text):
+    words = re.findall(r"\w+", text)
+
+    if not words:
+        return queryset
+
+    if uses_fts5():
+        # every word as a quoted prefix term, so user input is never FTS syntax
+        match = " ".join(f'"{word}"*' for word in words)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            (match,)
+        ))
+
+    if connection.vendor == "postgresql":
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT id FROM donations_request "
+            f"WHERE {PG_DOCUMENT} @@ plainto_tsquery('simple', %s)",
+            (" ".join(words),)
+        ))
+
+    for word in words:
+        queryset = queryset.filter(
+            Q(patient_name__icontains=word)
+            | Q(location__icontains=word)
+            | Q(reason__icontains=word)
+        )
+    return queryset
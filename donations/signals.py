@@ -0,0 +1,44 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+from .models import Request, AcceptedDonor, Tombstone
+from .search import index_requests, unindex_request
+from .feed import publish_requests, publish_offer
+
+# sent once per bulk_create batch (which skips post_save), with requests=[...]
+requests_created = Signal()
+
+
+@receiver(post_save, sender=Request)
+def index_request(sender, instance, **kwargs):
+    index_requests([instance])
+    publish_requests([instance])
+
+
+@receiver(post_delete, sender=Request)
+def remove_request_from_index(sender, instance, **kwargs):
+    unindex_request(instance.id)
+    publish_requests([instance], deleted=True)
+    Tombstone.objects.create(
+        kind="request", key=instance.short_id, owner_id=instance.requester_id
+    )
+
+
+@receiver(post_delete, sender=AcceptedDonor)
+def bury_offer(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind="offer",
+        key=instance.unique_id,
+        owner_id=instance.request.requester_id,
+    )
+
+
+@receiver(requests_created)
+def index_created_requests(sender, requests, **kwargs):
+    index_requests(requests)
+    publish_requests(requests)
+
+
+@receiver(post_save, sender=AcceptedDonor)
+def publish_accepted(sender, instance, created, **kwargs):
+    if created:
+        publish_offer(instance)